@@ -0,0 +1,88 @@
+"""
+Account deletion in two phases.
+
+soft_delete_user() runs in the request: it deactivates the account and
+frees its username and email, so the user can't log in any more and
+disappears from profile, search and friend lookups; their posts and
+comments drop out of feeds, search and batch results, which only show
+active users' content (see friends_filter). It then queues
+purge_user, which removes the user's rows in batches of
+DELETION_BATCH_SIZE, each in its own short transaction, instead of one
+cascade that locks a thousand posts and thousands of friendships and
+comments at once. Image files are removed after each batch commits.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+
+from friendships.models import Friendship
+from jobs.registry import task
+from posts.models import Comment, Post
+from posts.utils import remove_media_files
+from .export import remove_export_files
+from .models import DataExport
+
+# Not a valid registration username, so it can't clash with a real account
+DELETED_USERNAME = '~deleted-{id}'
+
+
+def batch_size():
+    return getattr(settings, 'DELETION_BATCH_SIZE', 500)
+
+
+def soft_delete_user(user):
+    """
+    Deactivate `user` now and queue the removal of their data.
+    """
+    with transaction.atomic():
+        user.username = DELETED_USERNAME.format(id=user.id)
+        user.email = ''
+        user.is_active = False
+        user.set_unusable_password()
+        user.save(update_fields=['username', 'email', 'is_active', 'password'])
+        purge_user.enqueue(user_id=user.id)
+
+
+def delete_in_batches(queryset, fields=(), after_commit=None):
+    """
+    Delete the rows of `queryset` a batch at a time, one transaction per batch.
+    `after_commit(rows)` runs once each batch has committed, with the batch's
+    (id, *fields) rows. Returns the number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('id').values_list('id', *fields)[:batch_size()])
+            if not rows:
+                return deleted
+            queryset.model.objects.filter(id__in=[row[0] for row in rows]).delete()
+            if after_commit:
+                transaction.on_commit(partial(after_commit, rows))
+        deleted += len(rows)
+
+
+@task(priority=5)
+def purge_user(user_id):
+    """
+    Remove a soft-deleted user's posts (with their images and comments),
+    comments, friendships and finally the user. Safe to rerun after a failure.
+    """
+    user = User.objects.filter(id=user_id, is_active=False).first()
+    if user is None:
+        return
+
+    # Posts go first, leaving tombstones while friends can still sync them.
+    # Each batch takes its posts' comments with it.
+    delete_in_batches(
+        Post.objects.filter(user_id=user_id), fields=['image_path'],
+        after_commit=lambda rows: remove_media_files(image_path for _, image_path in rows),
+    )
+    delete_in_batches(Comment.objects.filter(user_id=user_id))
+    delete_in_batches(Friendship.objects.filter(Q(user1_id=user_id) | Q(user2_id=user_id)))
+    archives = list(DataExport.objects.filter(user_id=user_id).exclude(file_name='').values_list('file_name', flat=True))
+    # Only the profile, exports and other small relations are left to cascade
+    user.delete()
+    remove_export_files(archives)
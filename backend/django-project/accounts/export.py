@@ -0,0 +1,177 @@
+"""
+Personal data export.
+
+start_export() queues build_export, which writes a ZIP archive to
+EXPORT_DIR without holding the user's data in memory: each JSON manifest
+is streamed into the archive from a chunked queryset, and images are
+copied from MEDIA_ROOT in blocks. The DataExport row tracks progress for
+the status endpoint.
+"""
+import json
+import os
+import secrets
+import zipfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from friendships.models import Friendship
+from jobs.registry import task
+from posts.models import Comment, Post
+from .models import DataExport
+
+# Rows fetched per query, and between progress updates
+CHUNK_SIZE = 500
+
+
+def export_dir():
+    return str(getattr(settings, 'EXPORT_DIR', settings.BASE_DIR / 'exports'))
+
+
+def export_path(export):
+    return os.path.join(export_dir(), export.file_name)
+
+
+def remove_export_files(file_names):
+    for file_name in file_names:
+        try:
+            os.remove(os.path.join(export_dir(), file_name))
+        except FileNotFoundError:
+            pass
+
+
+def start_export(user):
+    """
+    Queue an export for `user`, or return the one already in progress.
+    """
+    with transaction.atomic():
+        active = DataExport.objects.filter(
+            user=user, status__in=[DataExport.PENDING, DataExport.RUNNING]
+        ).first()
+        if active:
+            return active
+        export = DataExport.objects.create(user=user)
+        build_export.enqueue(export_id=export.id)
+    return export
+
+
+class Progress:
+    """
+    Counts exported rows and saves the percentage whenever it changes.
+    """
+    def __init__(self, export, total):
+        self.export = export
+        self.total = max(total, 1)
+        self.done = 0
+
+    def advance(self, rows=1):
+        self.done += rows
+        percent = min(99, self.done * 100 // self.total)  # 100 once the file is in place
+        if percent != self.export.progress:
+            self.export.progress = percent
+            DataExport.objects.filter(id=self.export.id).update(progress=percent)
+
+
+def write_json_lines(archive, name, rows, progress):
+    """
+    Stream `rows` (dicts) into the archive as a JSON array, one element per line.
+    """
+    count = 0
+    with archive.open(name, 'w', force_zip64=True) as f:
+        f.write(b'[')
+        for row in rows:
+            f.write(b',\n' if count else b'\n')
+            f.write(json.dumps(row, cls=DjangoJSONEncoder).encode())
+            count += 1
+            if count % CHUNK_SIZE == 0:
+                progress.advance(CHUNK_SIZE)
+        f.write(b'\n]\n')
+    progress.advance(count % CHUNK_SIZE)
+
+
+def write_archive(archive, user, progress):
+    profile = getattr(user, 'profile', None)
+    with archive.open('profile.json', 'w') as f:
+        f.write(json.dumps({
+            'username': user.username,
+            'email': user.email,
+            'date_joined': user.date_joined,
+            'display_name': profile.display_name if profile else '',
+            'bio': profile.bio if profile else '',
+            'link': profile.link if profile else '',
+        }, cls=DjangoJSONEncoder, indent=2).encode())
+    if profile and profile.profile_picture:
+        archive.writestr('profile_picture.jpg', bytes(profile.profile_picture), compress_type=zipfile.ZIP_STORED)
+
+    posts = Post.objects.filter(user=user).order_by('id').values('id', 'image_path', 'caption', 'created_at', 'updated_at')
+    image_paths = []
+
+    def post_rows():
+        for post in posts.iterator(chunk_size=CHUNK_SIZE):
+            image_paths.append(post['image_path'])
+            post['image'] = f"images/{post.pop('image_path')}"
+            yield post
+
+    write_json_lines(archive, 'posts.json', post_rows(), progress)
+
+    comments = Comment.objects.filter(user=user).order_by('id').values('id', 'post_id', 'comment_text', 'created_at')
+    write_json_lines(archive, 'comments.json', comments.iterator(chunk_size=CHUNK_SIZE), progress)
+
+    friendships = Friendship.objects.filter(Q(user1=user) | Q(user2=user), status='accepted').order_by('id')
+
+    def friend_rows():
+        for user1_id, user1_name, user2_name, since in friendships.values_list(
+            'user1_id', 'user1__username', 'user2__username', 'updated_at'
+        ).iterator(chunk_size=CHUNK_SIZE):
+            yield {'username': user2_name if user1_id == user.id else user1_name, 'since': since}
+
+    write_json_lines(archive, 'friends.json', friend_rows(), progress)
+
+    # JPEGs are already compressed; ZipFile.write copies them in blocks
+    written = set()
+    for image_path in image_paths:
+        full_path = os.path.join(settings.MEDIA_ROOT, image_path)
+        if image_path not in written and os.path.isfile(full_path):
+            archive.write(full_path, f'images/{image_path}', compress_type=zipfile.ZIP_STORED)
+            written.add(image_path)
+        progress.advance()
+
+
+@task(priority=-5, max_attempts=3)
+def build_export(export_id):
+    export = DataExport.objects.select_related('user', 'user__profile').filter(id=export_id).first()
+    if export is None or export.status == DataExport.READY:
+        return
+    user = export.user
+    DataExport.objects.filter(id=export.id).update(status=DataExport.RUNNING, progress=0)
+
+    total = (
+        2 * Post.objects.filter(user=user).count()  # Manifest row and image
+        + Comment.objects.filter(user=user).count()
+        + Friendship.objects.filter(Q(user1=user) | Q(user2=user), status='accepted').count()
+    )
+    progress = Progress(export, total)
+
+    os.makedirs(export_dir(), exist_ok=True)
+    file_name = f'{export.id}-{secrets.token_hex(8)}.zip'
+    path = os.path.join(export_dir(), file_name)
+    try:
+        with zipfile.ZipFile(path + '.partial', 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            write_archive(archive, user, progress)
+        os.replace(path + '.partial', path)
+    except Exception:
+        remove_export_files([file_name + '.partial'])
+        DataExport.objects.filter(id=export.id).update(status=DataExport.FAILED)
+        raise
+
+    # Only the newest archive is kept
+    older = DataExport.objects.filter(user=user, status=DataExport.READY).exclude(id=export.id)
+    remove_export_files(older.exclude(file_name='').values_list('file_name', flat=True))
+    older.delete()
+    DataExport.objects.filter(id=export.id).update(
+        status=DataExport.READY, progress=100, file_name=file_name,
+        size=os.path.getsize(path), finished_at=timezone.now(),
+    )
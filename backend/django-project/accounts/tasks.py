@@ -0,0 +1,3 @@
+# Imported by the jobs app at startup so workers know these jobs
+from .deletion import purge_user  # noqa: F401
+from .export import build_export  # noqa: F401
@@ -1,3 +1,113 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import zipfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from friendships.models import Friendship
+from jobs.worker import run_pending
+from posts.models import Comment, Post
+
+
+class DeleteAccountTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, DELETION_BATCH_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.friend = User.objects.create_user('bob', password='password123')
+        Friendship.objects.create(user1=self.user, user2=self.friend, status='accepted', requester=self.user)
+        for i in range(3):
+            with open(os.path.join(self.media_root, f'alice{i}.jpg'), 'wb') as f:
+                f.write(b'jpeg')
+            post = Post.objects.create(user=self.user, image_path=f'alice{i}.jpg', caption='hi')
+            Comment.objects.create(post=post, user=self.friend, comment_text='nice')
+        friend_post = Post.objects.create(user=self.friend, image_path='bob.jpg', caption='hi')
+        Comment.objects.create(post=friend_post, user=self.user, comment_text='hello')
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_wrong_password_keeps_account(self):
+        response = self.client.delete('/account/delete', {'password': 'nope'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(User.objects.get(id=self.user.id).is_active)
+
+    def test_deactivates_then_purges_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                '/account/delete', {'password': 'password123'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 202)
+        user = User.objects.get(id=self.user.id)
+        self.assertFalse(user.is_active)
+        self.assertFalse(User.objects.filter(username='alice').exists())
+
+        # Hidden from friends before the worker runs
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.friend))
+        feed = self.client.get('/api/posts/feed/').json()
+        self.assertEqual(feed['posts'], [])
+        own = self.client.get('/api/posts/me/').json()
+        self.assertEqual([comment['comment_text'] for post in own for comment in post['comments']], [])
+        alice_posts = list(Post.objects.filter(user_id=self.user.id).values_list('id', flat=True))
+        batch = self.client.get('/api/posts/batch/', {'ids': ','.join(map(str, alice_posts))}).json()
+        self.assertEqual(batch['missing'], alice_posts)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(Post.objects.filter(user_id=self.user.id).exists())
+        self.assertFalse(Comment.objects.filter(user_id=self.user.id).exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(Friendship.objects.exists())
+        self.assertEqual(os.listdir(self.media_root), [])
+        self.assertTrue(Post.objects.filter(user=self.friend).exists())
+
+
+class DataExportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media_root = os.path.join(directory.name, 'media')
+        os.makedirs(media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, EXPORT_DIR=os.path.join(directory.name, 'exports'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('alice', password='password123')
+        friend = User.objects.create_user('bob', password='password123')
+        Friendship.objects.create(user1=self.user, user2=friend, status='accepted', requester=self.user)
+        with open(os.path.join(media_root, 'alice.jpg'), 'wb') as f:
+            f.write(b'jpeg bytes')
+        post = Post.objects.create(user=self.user, image_path='alice.jpg', caption='hello')
+        Comment.objects.create(post=post, user=self.user, comment_text='first')
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_export_built_in_background_then_downloaded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/account/export')
+        self.assertEqual(response.status_code, 202)
+        status_url = f"/account/export/{response.json()['id']}"
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pending')
+
+        run_pending()
+        export = self.client.get(status_url).json()
+        self.assertEqual((export['status'], export['progress']), ('ready', 100))
+
+        response = self.client.get(export['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(json.loads(archive.read('posts.json'))[0]['image'], 'images/alice.jpg')
+        self.assertEqual(json.loads(archive.read('friends.json'))[0]['username'], 'bob')
+        self.assertEqual(json.loads(archive.read('comments.json'))[0]['comment_text'], 'first')
+        self.assertEqual(archive.read('images/alice.jpg'), b'jpeg bytes')
+
+        other = User.objects.create_user('mallory', password='password123')
+        self.client.cookies['access_token'] = str(AccessToken.for_user(other))
+        self.assertEqual(self.client.get(export['download_url']).status_code, 404)
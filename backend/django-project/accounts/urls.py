@@ -1,7 +1,8 @@
 from django.urls import path
 
 from .views import CustomTokenObtainPairView, CustomRefreshToken
-from .views import logout, is_authenticated, register
+from .views import logout, is_authenticated, register, delete_account
+from .views import request_data_export, data_export_status, download_data_export
 
 urlpatterns = [
     path('token', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -9,4 +10,8 @@ urlpatterns = [
     path('logout', logout),
     path('authenticated', is_authenticated),
     path('register', register),
+    path('delete', delete_account),
+    path('export', request_data_export),
+    path('export/<int:export_id>', data_export_status),
+    path('export/<int:export_id>/download', download_data_export),
 ]
\ No newline at end of file
@@ -1,10 +1,15 @@
-from django.shortcuts import render
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404, render
 
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .deletion import soft_delete_user
+from .export import export_path, start_export
+from .models import DataExport
 from .serializers import UserRegistrationSerializer
 
 # Create your views here.
@@ -113,4 +118,70 @@ def register(request):
         serializer.save()
         return Response(serializer.data)
     else:
-        return Response(serializer.errors)
\ No newline at end of file
+        return Response(serializer.errors)
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_account(request):
+    """
+    Delete the current user's account. Requires the password in the body.
+    The account is deactivated at once; posts, comments, friendships and
+    images are removed in the background.
+    """
+    if not request.user.check_password(request.data.get('password', '')):
+        return Response({'error': 'Incorrect password'}, status=status.HTTP_400_BAD_REQUEST)
+
+    soft_delete_user(request.user)
+
+    res = Response({'success': True}, status=status.HTTP_202_ACCEPTED)
+    res.delete_cookie('access_token', path='/', samesite='Lax')
+    res.delete_cookie('refresh_token', path='/', samesite='Lax')
+    return res
+
+
+def export_data(export):
+    return {
+        'id': export.id,
+        'status': export.status,
+        'progress': export.progress,
+        'size': export.size,
+        'created_at': export.created_at,
+        'finished_at': export.finished_at,
+        'download_url': f'/account/export/{export.id}/download' if export.status == DataExport.READY else None,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def request_data_export(request):
+    """
+    Start building an archive of the current user's data (or return the one in progress).
+    Poll the status endpoint until it is ready.
+    """
+    export = start_export(request.user)
+    return Response(export_data(export), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def data_export_status(request, export_id):
+    """
+    Get the status and progress (percent) of one of the current user's exports.
+    """
+    export = get_object_or_404(DataExport, id=export_id, user=request.user)
+    return Response(export_data(export))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_data_export(request, export_id):
+    """
+    Download a finished export as a ZIP file.
+    """
+    export = get_object_or_404(DataExport, id=export_id, user=request.user, status=DataExport.READY)
+    try:
+        archive = open(export_path(export), 'rb')
+    except FileNotFoundError:
+        return Response({'error': 'Export expired, request a new one'}, status=status.HTTP_410_GONE)
+    filename = f'cyberspace-{request.user.username}-{export.created_at:%Y%m%d}.zip'
+    return FileResponse(archive, as_attachment=True, filename=filename, content_type='application/zip')
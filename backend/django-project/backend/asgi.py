@@ -11,6 +11,8 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Use production settings when DJANGO_ENV is 'production'
+settings_module = 'backend.settings_prod' if os.getenv('DJANGO_ENV') == 'production' else 'backend.settings'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
 
 application = get_asgi_application()
@@ -0,0 +1,47 @@
+"""
+Helpers for the batch (multi-get) API endpoints.
+"""
+
+# Maximum number of items a single batch request may ask for
+MAX_BATCH_SIZE = 100
+
+# Largest value of a 64-bit primary key; bigger ids overflow in the database driver
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """
+    Cast for parse_batch_param: a primary key, an int from 1 to MAX_ID.
+    """
+    value = int(value)
+    if not 1 <= value <= MAX_ID:
+        raise ValueError
+    return value
+
+
+def parse_batch_param(request, name, cast=str):
+    """
+    Parse a comma-separated query parameter (e.g. ?ids=1,2,3) into a list.
+    Duplicates are dropped while keeping the requested order.
+    Raises ValueError with a client-facing message on bad input.
+    """
+    raw = request.query_params.get(name, '')
+    values = []
+    seen = set()
+    for item in raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = cast(item)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value in '{name}': {item}")
+        if value not in seen:
+            seen.add(value)
+            values.append(value)
+
+    if not values:
+        raise ValueError(f"'{name}' is required")
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many items in '{name}' (max {MAX_BATCH_SIZE})")
+    return values
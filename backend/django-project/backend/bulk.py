@@ -0,0 +1,23 @@
+"""
+Helpers for bulk loading rows with their original values.
+"""
+from contextlib import contextmanager
+
+
+@contextmanager
+def timestamps_from_values(*models):
+    """
+    Let bulk_create keep the created_at/updated_at values we set instead of "now".
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,40 @@
+"""
+Opaque cursors for keyset ("seek") pagination.
+
+A cursor holds the sort key of the last row on a page; the next page is
+the rows after it in sort order, so each page is an index range scan no
+matter how deep the client has scrolled, and rows inserted meanwhile
+never shift or repeat items.
+"""
+import base64
+import datetime
+import json
+
+
+def _default(value):
+    # Full precision; DjangoJSONEncoder would round datetimes to milliseconds
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not allowed in a cursor')
+
+
+def encode_cursor(*values):
+    """
+    Encode a row's sort key (strings, numbers, datetimes) as a URL-safe token.
+    """
+    data = json.dumps(values, default=_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, *casts):
+    """
+    Decode a cursor from encode_cursor(), converting each value with the matching cast.
+    Raises ValueError with a client-facing message on bad input.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(casts):
+            raise ValueError
+        return [cast(value) for cast, value in zip(casts, values)]
+    except (OverflowError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
@@ -0,0 +1,70 @@
+"""
+Change tracking for model instances.
+
+DirtyFieldsMixin remembers the values an instance was loaded (or last
+saved) with. save() then writes only the fields that changed, plus any
+auto_now fields, through update_fields, and issues no query at all when
+nothing changed. clean_changed() runs full_clean() on the changed fields
+only, so foreign key and uniqueness checks on untouched fields don't cost
+a query each.
+"""
+
+
+class DirtyFieldsMixin:
+    """
+    Mix into a model before models.Model: class Post(DirtyFieldsMixin, models.Model).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _remember_values(self, fields=None):
+        # Deferred fields aren't in __dict__ until loaded
+        loaded = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (fields is None or field.name in fields or field.attname in fields)
+        }
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = loaded
+        else:
+            self._loaded_values.update(loaded)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_values(fields)
+
+    def get_dirty_fields(self):
+        """
+        Names of the concrete fields changed since the instance was loaded or saved;
+        every field for an instance that isn't in the database yet.
+        """
+        fields = self._meta.concrete_fields
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return {field.name for field in fields}
+        return {
+            field.name for field in fields
+            if field.attname in self.__dict__
+            and (field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname])
+        }
+
+    def clean_changed(self):
+        """
+        full_clean() limited to the changed fields (clean() itself always runs).
+        """
+        dirty = self.get_dirty_fields()
+        self.full_clean(exclude=[field.name for field in self._meta.fields if field.name not in dirty])
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and hasattr(self, '_loaded_values'):
+            dirty = self.get_dirty_fields()
+            if dirty:
+                dirty.update(field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False))
+            # An empty update_fields makes save() a no-op
+            kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
@@ -1,27 +1,221 @@
 """
-Health check endpoint for monitoring and load balancers
+Health check endpoints for monitoring and load balancers
+
+- /health/live/  - the process is up and serving; never touches dependencies
+- /health/ready/ - database, media storage and cache all answer in time;
+                   also reports each read replica's lag
+- /health/       - kept as an alias of /health/ready/
+
+They are answered by HealthCheckMiddleware at the top of the middleware
+stack, so probes skip sessions, auth, CORS and URL resolution.
 """
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
 from django.http import JsonResponse
-from django.db import connection
 
-def health_check(request):
+from .routers import replica_status
+
+
+def check_timeout():
+    return getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+
+
+def fetch_one(conn, sql):
+    """
+    Run a check query on `conn` with a server-side limit of HEALTH_CHECK_TIMEOUT, so
+    a query that hangs is stopped rather than left running after the probe gives up.
+    """
+    timeout_ms = int(check_timeout() * 1000)
+    try:
+        if conn.vendor == 'postgresql':
+            # SET LOCAL, in a transaction, so the limit doesn't stay on a pooled connection
+            with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+                cursor.execute(f'SET LOCAL statement_timeout = {timeout_ms}')
+                cursor.execute(sql)
+                return cursor.fetchone()
+        with conn.cursor() as cursor:
+            if conn.vendor == 'sqlite':
+                # Only readiness threads use this connection
+                cursor.execute(f'PRAGMA busy_timeout = {timeout_ms}')
+            cursor.execute(sql)
+            return cursor.fetchone()
+    except Exception:
+        # Drop a broken connection so the next probe reconnects
+        conn.close()
+        raise
+
+
+def check_database():
+    """
+    Run a real round-trip query on the default database.
+    """
+    fetch_one(connection, "SELECT 1")
+
+
+def check_media():
+    """
+    Check MEDIA_ROOT exists and is writable.
+    """
+    with tempfile.NamedTemporaryFile(dir=settings.MEDIA_ROOT, prefix='.health-') as f:
+        f.write(b'ok')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def check_cache():
+    """
+    Check the default cache stores and returns a value.
+    """
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 'ok', timeout=10)
+    try:
+        if cache.get(key) != 'ok':
+            raise RuntimeError("Cache did not return the stored value")
+    finally:
+        cache.delete(key)
+
+
+def check_replicas():
+    """
+    Measure the replication lag of each DATABASE_REPLICAS alias. Unreachable and lagging
+    replicas only lose their reads (see backend/routers.py), so this never fails.
+    """
+    lag = replica_status.refresh()
+    return {'lag_seconds': lag, 'excluded': sorted(replica_status.excluded)}
+
+
+READINESS_CHECKS = {
+    'database': check_database,
+    'media': check_media,
+    'cache': check_cache,
+    'replicas': check_replicas,
+}
+
+
+# Checks run here, side by side, so one hung dependency neither delays the others nor
+# outlasts the probe.
+_executor = ThreadPoolExecutor(max_workers=len(READINESS_CHECKS), thread_name_prefix='readiness')
+
+# Check name -> future of its latest run; a check still running isn't started again
+_running = {}
+_running_lock = threading.Lock()
+
+
+def run_check(check):
     """
-    Health check endpoint that verifies:
-    - Application is running
-    - Database connection is working
+    Run one dependency check and report its latency, plus any details the check returns.
     """
+    start = time.perf_counter()
     try:
-        # Check database connection
-        connection.ensure_connection()
-        
-        return JsonResponse({
-            "status": "healthy",
-            "database": "connected",
-            "application": "running"
-        })
+        result = {'status': 'ok', **(check() or {})}
     except Exception as e:
-        return JsonResponse({
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
-        }, status=500)
+        result = {'status': 'error', 'error': str(e)}
+    finally:
+        # As at the end of a request: release connections CONN_MAX_AGE doesn't keep
+        close_old_connections()
+    result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def run_checks(timeout):
+    """
+    Run every readiness check at once and wait for all of them until one shared deadline.
+    Returns: dict of check name -> result
+    """
+    start = time.perf_counter()
+    futures = {}
+    with _running_lock:
+        for name, check in READINESS_CHECKS.items():
+            previous = _running.get(name)
+            if previous is None or previous.done():
+                _running[name] = _executor.submit(run_check, check)
+            futures[name] = _running[name]
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            results[name] = {
+                'status': 'error',
+                'error': f'Timed out after {timeout}s',
+                'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            }
+    return results
+
+
+def liveness_check(request):
+    """
+    Cheap liveness probe: answers as long as the worker can serve requests.
+    """
+    return JsonResponse({"status": "alive"})
+
+
+def readiness_check(request):
+    """
+    Readiness probe: checks every dependency and reports each one's latency.
+    Returns 503 if any check fails or times out.
+    """
+    checks = run_checks(check_timeout())
+    healthy = all(result['status'] == 'ok' for result in checks.values())
+
+    return JsonResponse({
+        "status": "healthy" if healthy else "unhealthy",
+        "checks": checks,
+    }, status=200 if healthy else 503)
+
+
+# Kept for existing monitors that call /health/
+health_check = readiness_check
+
+
+class HealthCheckMiddleware:
+    """
+    Answers health probes before the rest of the middleware stack runs.
+    Must be first in MIDDLEWARE.
+    """
+    sync_capable = True
+    async_capable = True
+
+    paths = {
+        '/health/live/': liveness_check,
+        '/health/ready/': readiness_check,
+        '/health/': health_check,
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def get_handler(self, request):
+        if request.method in ('GET', 'HEAD'):
+            return self.paths.get(request.path_info)
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        handler = self.get_handler(request)
+        if handler is not None:
+            return handler(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        handler = self.get_handler(request)
+        if handler is liveness_check:
+            return handler(request)
+        if handler is not None:
+            return await sync_to_async(handler, thread_sensitive=False)(request)
+        return await self.get_response(request)
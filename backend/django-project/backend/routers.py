@@ -0,0 +1,176 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware marks safe-method API requests as replica-eligible;
+ReplicaRouter then sends their reads to one of DATABASE_REPLICAS. Everything
+else (writes, admin, management commands, background tasks) uses `default`.
+
+After a successful write the user gets a short-lived cookie, and while it is
+present their reads stay on the primary, so they see their own new post or
+comment even if the replicas lag behind.
+
+Each process rechecks the replicas' lag in the background every
+REPLICA_CHECK_INTERVAL seconds (and on every readiness probe). A replica
+that is unreachable or more than REPLICA_MAX_LAG_SECONDS behind gets no
+reads until it catches up; with none left, reads go to the primary.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_lag(alias):
+    """
+    Seconds replica `alias` is behind the primary. Raises if it can't be reached.
+    """
+    from .health import fetch_one
+
+    replica = connections[alias]
+    if replica.vendor != 'postgresql':
+        return 0.0
+    return round(float(fetch_one(replica, REPLICA_LAG_SQL)[0]), 3)
+
+
+class ReplicaStatus:
+    """
+    The replicas excluded from reads at the last lag check, in this process.
+    """
+
+    def __init__(self):
+        self.excluded = frozenset()
+        self.checked_at = None  # time.monotonic() of the last check started
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Measure every replica's lag and exclude the unreachable and lagging ones.
+        Returns: dict of alias -> lag in seconds, None if unreachable
+        """
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+        lag = {}
+        for alias in getattr(settings, 'DATABASE_REPLICAS', []):
+            try:
+                lag[alias] = replica_lag(alias)
+            except Exception as e:
+                logger.warning(f"Replica {alias} unreachable: {e}")
+                lag[alias] = None
+        excluded = frozenset(alias for alias, seconds in lag.items() if seconds is None or seconds > max_lag)
+        if excluded != self.excluded:
+            logger.warning(f"Replicas excluded from reads: {sorted(excluded) or 'none'} (lag: {lag})")
+        self.excluded = excluded
+        return lag
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Replica lag check failed")
+        finally:
+            connections.close_all()  # This thread's connections
+            self.lock.release()
+
+    def usable(self, replicas):
+        """
+        The replicas in `replicas` that may serve reads, starting a background
+        recheck when the last one is older than REPLICA_CHECK_INTERVAL.
+        """
+        interval = getattr(settings, 'REPLICA_CHECK_INTERVAL', 5)
+        if self.checked_at is None or time.monotonic() - self.checked_at >= interval:
+            if self.lock.acquire(blocking=False):
+                self.checked_at = time.monotonic()
+                threading.Thread(target=self._refresh_in_background, name='replica-lag', daemon=True).start()
+        return [alias for alias in replicas if alias not in self.excluded]
+
+
+replica_status = ReplicaStatus()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and _use_replica.get():
+            usable = replica_status.usable(replicas)
+            if usable:
+                return random.choice(usable)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets ReplicaRouter use replicas for safe API requests, and pins a user's
+    reads to the primary for REPLICA_STICKY_SECONDS after they write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    path_prefixes = ('/api/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def replica_allowed(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and request.path_info.startswith(self.path_prefixes)
+            and getattr(settings, 'REPLICA_STICKY_COOKIE', 'primary_reads') not in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        if (getattr(settings, 'DATABASE_REPLICAS', []) and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(
+                getattr(settings, 'REPLICA_STICKY_COOKIE', 'primary_reads'), '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _use_replica.set(self.replica_allowed(request))
+        try:
+            return self.process_response(request, self.get_response(request))
+        finally:
+            _use_replica.reset(token)
+
+    async def __acall__(self, request):
+        token = _use_replica.set(self.replica_allowed(request))
+        try:
+            return self.process_response(request, await self.get_response(request))
+        finally:
+            _use_replica.reset(token)
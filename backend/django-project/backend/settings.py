@@ -48,17 +48,29 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'friendships',
+    'notifications',
+    'jobs',
+    'instance',
+    'search',
+    'idempotency',
+    'monitoring',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',  # Must be first for CORS headers
+    'backend.health.HealthCheckMiddleware',  # Answers /health/ probes before anything else runs
+    'corsheaders.middleware.CorsMiddleware',  # Must be first (after health checks) for CORS headers
     'django.middleware.security.SecurityMiddleware',
+    'monitoring.middleware.RequestInstrumentationMiddleware',  # Query count and timings per request
+    'backend.routers.ReplicaRoutingMiddleware',  # Safe API reads may use DATABASE_REPLICAS
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',  # Disabled for JWT API (JWT provides security)
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'idempotency.middleware.IdempotencyMiddleware',  # Replays responses to retried Idempotency-Key requests
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.profiling.ProfilerMiddleware',  # Needs request.user from AuthenticationMiddleware
 ]
 
 REST_FRAMEWORK = {
@@ -68,6 +80,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON stays the default; clients opt into MessagePack via the Accept header
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'backend.renderers.MessagePackRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'backend.renderers.MessagePackParser',
+    ),
 }
 
 # JWT Settings (rest_framework_simplejwt)
@@ -96,11 +120,18 @@ SIMPLE_JWT = {
 }
 
 # CORS Settings for cookie-based authentication
+from corsheaders.defaults import default_headers
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite dev server
     "http://127.0.0.1:5173",  # Alternative localhost
 ]
 CORS_ALLOW_CREDENTIALS = True  # Required for cookies
+CORS_EXPOSE_HEADERS = [
+    'X-Watermark',  # Sent with 304 replies from the feed delta-sync endpoint
+    'Idempotent-Replayed',
+]
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # CSRF Settings (kept for admin panel, but API is exempt via middleware removal)
 CSRF_TRUSTED_ORIGINS = [
@@ -126,6 +157,61 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Request instrumentation (monitoring.middleware.RequestInstrumentationMiddleware)
+SERVER_TIMING_HEADER = True  # Send db/serializer/view timings in a Server-Timing header
+SLOW_REQUEST_MS = 500  # Requests slower than this are logged with their slowest queries
+
+# Request profiling (monitoring.profiling.ProfilerMiddleware): staff send the
+# header or query flag, and PROFILER_SAMPLE_RATE of all requests are sampled
+PROFILER_HEADER = 'X-Profile'
+PROFILER_QUERY_PARAM = 'profile'
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_DIR = BASE_DIR / 'request_profiles'
+PROFILER_MAX_FILES = 200  # Oldest profiles beyond this are deleted
+
+HEALTH_CHECK_TIMEOUT = 2.0  # Seconds the readiness checks, run side by side, may take
+
+# Maximum queries per view (by URL name), including the authentication lookup.
+# Exceeding a budget logs a warning, or raises QueryBudgetExceeded when
+# ENFORCE_QUERY_BUDGETS is on (tests turn it on with override_settings).
+QUERY_BUDGETS = {
+    'post_feed': 5,  # Ranked mode: candidates, affinity, page, comments
+    'post_feed_changes': 10,
+    'get_post': 3,
+    'posts_batch': 3,
+    'get_friends': 4,
+    'friendship_statuses': 3,
+    'profile_by_username': 2,
+    'profiles_batch': 2,
+    'get_profile_picture': 2,
+    'search_users': 2,
+    'search_posts': 4,
+}
+ENFORCE_QUERY_BUDGETS = False
+
+# Server-push notifications: InMemoryBroker only reaches clients in the same process
+NOTIFICATIONS_BROKER = 'notifications.brokers.InMemoryBroker'
+NOTIFICATIONS_POLL_INTERVAL = 1.0  # Seconds between DatabaseBroker polls
+
+# Background jobs (see jobs/): run with `python manage.py runworker`
+JOBS_POLL_INTERVAL = 1.0  # Seconds an idle worker waits before checking the queue again
+JOBS_RETRY_BASE_DELAY = 5  # Seconds before the first retry; doubles with each attempt
+JOBS_RETRY_MAX_DELAY = 3600
+JOBS_HEARTBEAT_INTERVAL = 30  # Seconds between locked_at refreshes while a job runs
+JOBS_LOCK_TIMEOUT = 600  # A running job without a heartbeat for this long is assumed to have lost its worker
+JOBS_RETENTION_DAYS = 7  # Finished jobs are deleted after this many days
+
+# Rows removed per transaction when purging a deleted account (see accounts/deletion.py)
+DELETION_BATCH_SIZE = 500
+
+# Personal data export archives (see accounts/export.py); kept out of MEDIA_ROOT so they aren't public
+EXPORT_DIR = BASE_DIR / 'exports'
+
+# Idempotency-Key support for mutating API requests (see idempotency/middleware.py)
+IDEMPOTENCY_KEY_TTL = 24 * 3600  # Seconds a stored response is replayed; prune with prune_idempotency_keys
+IDEMPOTENCY_LOCK_TIMEOUT = 30  # Seconds before a running request is presumed dead and a retry takes its key over
 
 
 # Database
@@ -138,6 +224,22 @@ DATABASES = {
     }
 }
 
+# Read replicas: aliases in DATABASES that safe API reads may use (see backend/routers.py)
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_COOKIE = 'primary_reads'
+REPLICA_STICKY_SECONDS = 5  # After a write, the user's reads stay on the primary this long
+REPLICA_MAX_LAG_SECONDS = 30  # A replica further behind gets no reads until it catches up
+REPLICA_CHECK_INTERVAL = 5  # Seconds between each process's background replica lag checks
+
+
+# Cache - counts hits and misses for the cache_requests_total metric
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.InstrumentedLocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
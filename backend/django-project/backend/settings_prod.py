@@ -17,18 +17,78 @@ SECRET_KEY = os.getenv('SECRET_KEY', SECRET_KEY)
 allowed_hosts_str = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1')
 ALLOWED_HOSTS = [host.strip() for host in allowed_hosts_str.split(',') if host.strip()]
 
-# Database - PostgreSQL for production
+# Database - PostgreSQL for production, or DB_ENGINE=sqlite for small self-hosted setups
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql')
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Django's PostgreSQL backend plus the db_connection_acquire_seconds metric
+        'ENGINE': 'monitoring.db.postgresql',
         'NAME': os.getenv('DB_NAME', 'cyberspace'),
         'USER': os.getenv('DB_USER', 'cyberspace_user'),
         'PASSWORD': os.getenv('DB_PASSWORD', 'changeme123'),
         'HOST': os.getenv('DB_HOST', 'db'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+# Database connections:
+#   pool       - a psycopg pool in each worker process (default; works under ASGI)
+#   persistent - CONN_MAX_AGE reuse, only useful with sync (WSGI) workers
+#   none       - connect on every request
+DB_CONN_MODE = os.getenv('DB_CONN_MODE', 'pool')
+GUNICORN_WORKERS = int(os.getenv('GUNICORN_WORKERS', '3'))
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '1'))
+if DB_CONN_MODE == 'pool':
+    # All workers' pools together stay within DB_MAX_CONNECTIONS, leaving the rest
+    # of PostgreSQL's max_connections (100) for the events service, migrations and psql.
+    # Threaded sync workers never need more connections than threads.
+    pool_share = max(2, int(os.getenv('DB_MAX_CONNECTIONS', '60')) // GUNICORN_WORKERS)
+    if GUNICORN_THREADS > 1:
+        pool_share = min(pool_share, GUNICORN_THREADS)
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', pool_share)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),  # Seconds to wait for a free connection
+        'max_idle': 300,
+    }
+elif DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+# Read replicas - comma-separated hosts with the same credentials as the primary
+replica_hosts_str = os.getenv('DB_REPLICA_HOSTS', '')
+for index, host in enumerate(host.strip() for host in replica_hosts_str.split(',') if host.strip()):
+    # Each replica alias gets its own pool of the same size
+    DATABASES[f'replica{index + 1}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+if DB_ENGINE == 'sqlite':
+    # WAL, busy timeout and cache pragmas plus a read-only alias for safe API reads
+    from .sqlite import sqlite_databases
+    DATABASES = sqlite_databases(os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '30'))
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+
+# Cache shared by all workers in the container
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.InstrumentedFileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', '/tmp/django_cache'),
+    }
+}
+
+# Notifications - share events between the ASGI worker processes
+NOTIFICATIONS_BROKER = os.getenv('NOTIFICATIONS_BROKER', 'notifications.brokers.DatabaseBroker')
+
+# Request profiling - sample nothing unless asked; files stay inside the container
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))
+PROFILER_DIR = os.getenv('PROFILER_DIR', '/tmp/profiles')
+
 # CORS Settings
 cors_origins_str = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost')
 CORS_ALLOWED_ORIGINS = [origin.strip() for origin in cors_origins_str.split(',') if origin.strip()]
@@ -50,6 +110,9 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Data export archives, written by the worker and served by the backend
+EXPORT_DIR = os.getenv('EXPORT_DIR', BASE_DIR / 'exports')
+
 # Security settings for production
 if not DEBUG:
     # Set these to True when using HTTPS in production
@@ -0,0 +1,149 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from posts.models import Post
+from . import health
+from .routers import ReplicaRouter, ReplicaRoutingMiddleware, replica_status
+from .sqlite import sqlite_databases
+
+
+class HealthCheckTests(TestCase):
+    def test_liveness(self):
+        response = self.client.get('/health/live/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'alive'})
+
+    def test_readiness(self):
+        response = self.client.get('/health/ready/')
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(list(checks), ['database', 'media', 'cache', 'replicas'])
+        self.assertTrue(all(check['status'] == 'ok' for check in checks.values()))
+
+    @override_settings(HEALTH_CHECK_TIMEOUT=0.3)
+    def test_hung_check_times_out_alone(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_cache():
+            release.wait(10)
+
+        def slow_media():
+            time.sleep(0.2)
+
+        with mock.patch.dict(health.READINESS_CHECKS, {'cache': slow_cache, 'media': slow_media}):
+            started = time.monotonic()
+            response = self.client.get('/health/ready/')
+            self.assertLess(time.monotonic() - started, 1)
+            checks = response.json()['checks']
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(checks['cache']['error'], 'Timed out after 0.3s')
+            # Run alongside the hung check, not queued behind it
+            self.assertEqual(checks['media']['status'], 'ok')
+            self.assertEqual(checks['database']['status'], 'ok')
+
+            # The next probe waits on the same run instead of starting another
+            hung = health._running['cache']
+            self.assertEqual(self.client.get('/health/ready/').status_code, 503)
+            self.assertIs(health._running['cache'], hung)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_COOKIE='primary_reads', REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        # As if a lag check had just found every replica fine
+        replica_status.excluded = frozenset()
+        replica_status.checked_at = time.monotonic()
+        self.factory = RequestFactory()
+
+    def route(self, request, status=200):
+        """
+        Pass `request` through the middleware. Returns (alias the view read from, response).
+        """
+        read_from = []
+
+        def view(request):
+            read_from.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse(status=status)
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return read_from[0], response
+
+    def test_safe_api_reads_use_replicas(self):
+        self.assertEqual(self.route(self.factory.get('/api/posts/feed/'))[0], 'replica1')
+        self.assertEqual(self.route(self.factory.get('/admin/'))[0], 'default')
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')  # Outside a request
+        self.assertEqual(ReplicaRouter().db_for_write(Post), 'default')
+
+    def test_writes_pin_reads_to_primary(self):
+        alias, response = self.route(self.factory.post('/api/posts/'), status=201)
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies['primary_reads']['max-age'], 5)
+
+        request = self.factory.get('/api/posts/feed/')
+        request.COOKIES['primary_reads'] = '1'
+        self.assertEqual(self.route(request)[0], 'default')
+
+        # A failed write doesn't pin
+        self.assertNotIn('primary_reads', self.route(self.factory.post('/api/posts/'), status=400)[1].cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2', 'replica3'], REPLICA_MAX_LAG_SECONDS=30)
+    def test_lagging_and_unreachable_replicas_get_no_reads(self):
+        def lag(alias):
+            if alias == 'replica3':
+                raise OSError('connection refused')
+            return {'replica1': 120.0, 'replica2': 0.5}[alias]
+
+        with mock.patch('backend.routers.replica_lag', side_effect=lag), self.assertLogs('backend.routers', 'WARNING'):
+            result = health.check_replicas()
+        self.addCleanup(setattr, replica_status, 'excluded', frozenset())
+        self.assertEqual(result, {
+            'lag_seconds': {'replica1': 120.0, 'replica2': 0.5, 'replica3': None},
+            'excluded': ['replica1', 'replica3'],
+        })
+        for _ in range(5):
+            self.assertEqual(self.route(self.factory.get('/api/posts/feed/'))[0], 'replica2')
+
+
+class SqliteSettingsTests(SimpleTestCase):
+    # SimpleTestCase blocks queries by alias name, and these connections reuse 'default'
+    databases = {'default'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Separate from django.db.connections, so the test database is untouched
+        self.connections = ConnectionHandler(sqlite_databases(Path(directory.name) / 'db.sqlite3', busy_timeout=7))
+        self.addCleanup(self.connections.close_all)
+
+    def pragma(self, alias, name):
+        with self.connections[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        self.assertEqual(self.pragma('default', 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma('default', 'busy_timeout'), 7000)
+        self.assertEqual(self.pragma('default', 'synchronous'), 1)  # NORMAL
+
+    def test_readonly_alias_rejects_writes(self):
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            cursor.execute('INSERT INTO item VALUES (1)')
+
+        self.assertEqual(self.pragma('readonly', 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma('readonly', 'busy_timeout'), 7000)
+        self.assertEqual(self.pragma('readonly', 'query_only'), 1)
+        with self.connections['readonly'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            with self.assertRaises(OperationalError):
+                cursor.execute('INSERT INTO item VALUES (2)')
@@ -16,15 +16,18 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from .health import health_check
+from monitoring.views import metrics
 
 urlpatterns = [
-    path('health/', health_check, name='health_check'),
+    path('metrics', metrics, name='metrics'),
+    path('admin/profiles/', include('monitoring.urls')),
     path('admin/', admin.site.urls),
     path('account/', include('accounts.urls')),
     path('api/profile/', include('profiles.urls')),
     path('api/posts/', include('posts.urls')),
     path('api/friends/', include('friendships.urls')),
+    path('api/events/', include('notifications.urls')),
+    path('api/search/', include('search.urls')),
 ]
 
 # Serve media files in development
@@ -0,0 +1,165 @@
+"""
+Minimal asyncio HTTP/1.1 client used by the benchmark commands.
+
+Only the standard library is used so benchmarks can run anywhere the
+backend runs. Each HTTPConnection keeps one keep-alive connection open.
+"""
+import asyncio
+import json
+import uuid
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+
+class HTTPResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name, default=None):
+        name = name.lower()
+        for key, value in self.headers:
+            if key == name:
+                return value
+        return default
+
+    def cookies(self):
+        cookies = {}
+        for key, value in self.headers:
+            if key == 'set-cookie':
+                cookie = SimpleCookie()
+                cookie.load(value)
+                cookies.update({name: morsel.value for name, morsel in cookie.items()})
+        return cookies
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HTTPConnection:
+    """
+    One keep-alive connection to `base_url`. Reconnects when the server closes it.
+    """
+    def __init__(self, base_url, cookies=None, timeout=30):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError("Only http:// URLs are supported")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.cookies = dict(cookies or {})
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """
+        Send a request and read the whole response. Retries once on a stale connection.
+        """
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await asyncio.wait_for(self._send(method, path, body, headers or {}), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _send(self, method, path, body, headers):
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+        ]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{name}={value}" for name, value in self.cookies.items()))
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        response_headers = []
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers.append((name.strip().lower(), value.strip()))
+
+        response = HTTPResponse(status, response_headers, b'')
+        if response.header('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            response.body = b''.join(chunks)
+        elif method != 'HEAD' and status not in (204, 304):
+            response.body = await self.reader.readexactly(int(response.header('content-length', '0')))
+
+        if response.header('connection', '').lower() == 'close':
+            await self.close()
+        self.cookies.update(response.cookies())
+        return response
+
+    async def post_json(self, path, data):
+        return await self.request(
+            'POST', path, json.dumps(data).encode(), {'Content-Type': 'application/json'}
+        )
+
+    async def post_multipart(self, path, fields, files):
+        """
+        POST a multipart/form-data body. `files` maps field name to (filename, content_type, bytes).
+        """
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, content_type, content) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return await self.request(
+            'POST', path, b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        )
+
+
+async def login(base_url, username, password):
+    """
+    Log in through /account/token and return the auth cookies.
+    """
+    connection = HTTPConnection(base_url)
+    try:
+        response = await connection.post_json('/account/token', {'username': username, 'password': password})
+        if response.status != 200 or not response.json().get('success'):
+            raise ValueError(f"Login failed for {username}")
+        return dict(connection.cookies)
+    finally:
+        await connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
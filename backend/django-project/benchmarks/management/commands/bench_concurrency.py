@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.client import HTTPConnection, login, percentile
+
+
+DEFAULT_PATHS = [
+    '/api/posts/feed/',
+    '/api/friends/',
+    '/api/profile/{username}/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure throughput of read endpoints against a running server at high concurrency. '
+        'Run it once against the WSGI deployment and once against the ASGI one to compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='Server to test, e.g. http://localhost:8000')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--concurrency', type=int, default=100, help='Simultaneous connections')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+
+    def handle(self, *args, **options):
+        paths = [path.format(username=options['username']) for path in options['paths'] or DEFAULT_PATHS]
+        try:
+            results, elapsed = asyncio.run(self.run(options, paths))
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'path':<32} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for path in paths:
+            latencies = sorted(latency for latency, ok in results[path])
+            errors = sum(1 for latency, ok in results[path] if not ok)
+            self.stdout.write(
+                f"{path:<32} {len(latencies):>9} {len(latencies) / elapsed:>9.1f} "
+                f"{percentile(latencies, 0.50):>9.1f} {percentile(latencies, 0.95):>9.1f} "
+                f"{percentile(latencies, 0.99):>9.1f} {errors:>7}"
+            )
+        total = sum(len(samples) for samples in results.values())
+        self.stdout.write(self.style.SUCCESS(f"Total: {total / elapsed:.1f} req/s over {elapsed:.1f}s"))
+
+    async def run(self, options, paths):
+        cookies = await login(options['base_url'], options['username'], options['password'])
+        results = {path: [] for path in paths}
+        deadline = time.monotonic() + options['duration']
+
+        async def worker(index):
+            connection = HTTPConnection(options['base_url'], cookies=cookies)
+            request_number = index
+            try:
+                while time.monotonic() < deadline:
+                    path = paths[request_number % len(paths)]
+                    request_number += 1
+                    start = time.perf_counter()
+                    try:
+                        response = await connection.request('GET', path)
+                        ok = response.status < 400
+                    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                        ok = False
+                    results[path].append(((time.perf_counter() - start) * 1000, ok))
+            finally:
+                await connection.close()
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(options['concurrency'])))
+        return results, time.monotonic() - start
@@ -0,0 +1,91 @@
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+
+from benchmarks.client import percentile
+from benchmarks.suite import BenchmarkContext, pick_viewer, request_host
+
+MODES = ('none', 'persistent', 'pool')
+
+
+def configure(mode, pool_size):
+    """
+    Switch the default connection to `mode`, dropping any open connection and pool.
+    """
+    connection.close()
+    connection.close_pool()
+    settings_dict = connection.settings_dict
+    settings_dict['OPTIONS'] = {key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'}
+    settings_dict['CONN_MAX_AGE'] = 60 if mode == 'persistent' else 0
+    if mode == 'pool':
+        settings_dict['OPTIONS']['pool'] = {'min_size': pool_size, 'max_size': pool_size}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure get_feed latency on PostgreSQL with a new connection per request, "
+        "persistent connections (CONN_MAX_AGE) and a connection pool. Connections are "
+        "released after each call the same way Django does at the end of a request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to act as (default: the seeded user with the most friends)')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--prefix', default='bench_', help='Username prefix used by seed_social_graph')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--pool-size', type=int, default=2)
+        parser.add_argument('--path', default='/api/posts/feed/?limit=20')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Connection pooling is only available with PostgreSQL")
+
+        if options['username']:
+            viewer = User.objects.filter(username=options['username']).first()
+        else:
+            viewer = pick_viewer(options['prefix'])
+        if viewer is None:
+            raise CommandError("No benchmark user found; run seed_social_graph first or pass --username")
+        ctx = BenchmarkContext(viewer, options['password'])
+
+        client = Client(raise_request_exception=False, HTTP_HOST=request_host())
+        client.cookies['access_token'] = ctx.access_token
+
+        logging.disable(logging.WARNING)
+        original = (connection.settings_dict['CONN_MAX_AGE'], dict(connection.settings_dict['OPTIONS']))
+        results = {}
+        try:
+            for mode in MODES:
+                configure(mode, options['pool_size'])
+                latencies = []
+                for iteration in range(options['warmup'] + options['iterations']):
+                    start = time.perf_counter()
+                    response = client.get(options['path'])
+                    # The test client skips Django's request_finished cleanup
+                    close_old_connections()
+                    elapsed = (time.perf_counter() - start) * 1000
+                    if response.status_code != 200:
+                        raise CommandError(f"{options['path']} returned {response.status_code}")
+                    if iteration >= options['warmup']:
+                        latencies.append(elapsed)
+                results[mode] = sorted(latencies)
+        finally:
+            connection.close()
+            connection.close_pool()
+            connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['OPTIONS'] = original
+
+        self.stdout.write(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+        for mode, latencies in results.items():
+            self.stdout.write(
+                f"{mode:<12} {percentile(latencies, 0.50):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+                f"{sum(latencies) / len(latencies):>8.2f}"
+            )
+        baseline = percentile(results['none'], 0.50)
+        self.stdout.write(self.style.SUCCESS(
+            f"Pooled p50 is {baseline - percentile(results['pool'], 0.50):.2f} ms lower than connecting per request"
+        ))
@@ -0,0 +1,141 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from backend.sqlite import sqlite_databases
+from benchmarks.client import percentile
+from friendships.utils import friends_filter
+from posts.models import Comment, Post
+
+WRITE_ALIAS = 'bench_write'
+READ_ALIAS = 'bench_read'
+
+
+def profile_databases(profile, path):
+    """
+    (write, read) DATABASES entries for `profile` on the SQLite file at `path`.
+    """
+    if profile == 'tuned':
+        databases = sqlite_databases(path)
+        return databases['default'], databases['readonly']
+    default = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path), 'OPTIONS': {}}
+    return default, default
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent feed reads and comment writes against copies of a SQLite database, "
+        "once with SQLite's defaults (rollback journal, deferred transactions) and once with "
+        "the tuned profile from backend/sqlite.py, and compare throughput, latency and "
+        "'database is locked' errors. Each thread has its own connection, like a gunicorn worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='SQLite file to copy (default: the default database)')
+        parser.add_argument('--readers', type=int, default=8, help='Threads loading feeds')
+        parser.add_argument('--writers', type=int, default=4, help='Threads adding comments')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+        parser.add_argument('--prefix', default='bench_', help='Username prefix used by seed_social_graph')
+
+    def handle(self, *args, **options):
+        source = options['database']
+        if source is None:
+            if connections['default'].vendor != 'sqlite':
+                raise CommandError("The default database isn't SQLite; pass --database")
+            source = connections['default'].settings_dict['NAME']
+        if not os.path.exists(source):
+            raise CommandError(f"{source} does not exist")
+
+        user_ids = list(
+            User.objects.filter(username__startswith=options['prefix']).values_list('id', flat=True)[:1000]
+        )
+        post_ids = list(Post.objects.filter(user_id__in=user_ids).values_list('id', flat=True)[:1000])
+        if not user_ids or not post_ids:
+            raise CommandError("No benchmark users with posts found; run seed_social_graph first")
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in ('defaults', 'tuned'):
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+                    src.backup(dst)
+                    dst.execute('PRAGMA journal_mode=DELETE')
+                self.stdout.write(f"Running {profile}...")
+                results[profile] = self.run(profile, path, user_ids, post_ids, options)
+
+        self.stdout.write(
+            f"\n{'profile':<10} {'op':<6} {'ops':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'locked':>7}"
+        )
+        for profile, ops in results.items():
+            for op, (latencies, locked) in ops.items():
+                latencies.sort()
+                self.stdout.write(
+                    f"{profile:<10} {op:<6} {len(latencies):>7} {len(latencies) / options['duration']:>8.1f} "
+                    f"{percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+                    f"{percentile(latencies, 0.99):>8.1f} {locked:>7}"
+                )
+
+    def run(self, profile, path, user_ids, post_ids, options):
+        write_settings, read_settings = profile_databases(profile, path)
+        template = connections['default'].settings_dict
+        connections.settings[WRITE_ALIAS] = {**template, **write_settings}
+        connections.settings[READ_ALIAS] = {**template, **read_settings}
+
+        results = {'read': ([], 0), 'write': ([], 0)}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def read():
+            viewer = User(id=random.choice(user_ids))
+            list(
+                Post.objects.using(READ_ALIAS).filter(friends_filter(viewer))
+                .select_related('user', 'user__profile').order_by('-created_at')[:20]
+            )
+
+        def write():
+            with transaction.atomic(using=WRITE_ALIAS):
+                # bulk_create skips the notification signals, which would write to `default`
+                Comment.objects.using(WRITE_ALIAS).bulk_create([Comment(
+                    post_id=random.choice(post_ids), user_id=random.choice(user_ids),
+                    comment_text='Concurrency benchmark',
+                )])
+
+        def worker(op, action):
+            latencies, locked = [], 0
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        action()
+                    except OperationalError as e:
+                        if 'locked' not in str(e):
+                            raise
+                        locked += 1
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections[READ_ALIAS].close()
+                connections[WRITE_ALIAS].close()
+            with lock:
+                all_latencies, all_locked = results[op]
+                results[op] = (all_latencies + latencies, all_locked + locked)
+
+        threads = [threading.Thread(target=worker, args=('read', read)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('write', write)) for _ in range(options['writers'])]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            del connections.settings[WRITE_ALIAS]
+            del connections.settings[READ_ALIAS]
+        return results
@@ -0,0 +1,145 @@
+import json
+import logging
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from benchmarks.suite import SCENARIOS, BenchmarkContext, MissingData, call_scenario, pick_viewer
+
+# Statements worth explaining; SAVEPOINTs and INSERTs have no plan to speak of
+EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+SQLITE_SCAN = re.compile(r'^SCAN (\S+)(.*)$')
+SQLITE_AUTOMATIC_INDEX = re.compile(r'^(?:SEARCH|SCAN) (\S+) USING AUTOMATIC')
+
+# Sorts that merge rows from many index ranges (posts of many friends, comments
+# of many posts) can't come in order from any single index; LIMIT or the batch
+# size keeps them small. Reported with --strict.
+ACCEPTED_FINDINGS = {
+    'posts.feed': {'filesort'},
+    'posts.feed_changes': {'filesort'},
+    'posts.batch': {'filesort'},
+}
+
+
+def explain_sqlite(cursor, sql):
+    """
+    Findings from SQLite's EXPLAIN QUERY PLAN as (kind, table, detail) tuples.
+    """
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    findings = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        automatic = SQLITE_AUTOMATIC_INDEX.match(detail)
+        scan = SQLITE_SCAN.match(detail)
+        if automatic:
+            findings.append(('missing_index', automatic.group(1), detail))
+        elif scan and scan.group(1) != 'CONSTANT' and 'INDEX' not in scan.group(2):
+            findings.append(('seq_scan', scan.group(1), detail))
+        elif detail.startswith('USE TEMP B-TREE'):
+            findings.append(('filesort', '', detail))
+    return findings
+
+
+def explain_postgresql(cursor, sql):
+    """
+    Findings from PostgreSQL's EXPLAIN (FORMAT JSON) as (kind, table, detail) tuples.
+
+    Sequential scans and sorts are disabled for the planner first, so any that
+    remain could not be avoided with the existing indexes, whatever the table sizes.
+    """
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    cursor.execute('SET LOCAL enable_sort = off')
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):  # psycopg2 without the json adapter
+        plan = json.loads(plan)
+
+    findings = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', []))
+        if node['Node Type'] == 'Seq Scan':
+            findings.append(('seq_scan', node['Relation Name'], f"Seq Scan on {node['Relation Name']}"))
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            findings.append(('filesort', '', f"Sort by {', '.join(node.get('Sort Key', []))}"))
+    return findings
+
+
+EXPLAINERS = {
+    'sqlite': explain_sqlite,
+    'postgresql': explain_postgresql,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the queries of every benchmarked endpoint against the current (seeded) database "
+        "with EXPLAIN and flag sequential scans, sorts without an index and automatic indexes. "
+        "Exits with status 1 when anything is flagged, so it can gate migrations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to act as (default: the seeded user with the most friends)')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--prefix', default='bench_', help='Username prefix used by seed_social_graph')
+        parser.add_argument('--only', action='append', help='Scenario name prefix to check, e.g. posts. (repeatable)')
+        parser.add_argument(
+            '--allow', action='append', default=[],
+            help='Ignore findings as kind:table, e.g. seq_scan:django_content_type (repeatable)',
+        )
+        parser.add_argument('--strict', action='store_true', help='Also report the ACCEPTED_FINDINGS')
+        parser.add_argument('--verbose-sql', action='store_true', help='Print the full SQL of flagged queries')
+
+    def handle(self, *args, **options):
+        explain = EXPLAINERS.get(connection.vendor)
+        if explain is None:
+            raise CommandError(f"EXPLAIN parsing isn't implemented for {connection.vendor}")
+
+        if options['username']:
+            viewer = User.objects.filter(username=options['username']).first()
+        else:
+            viewer = pick_viewer(options['prefix'])
+        if viewer is None:
+            raise CommandError("No benchmark user found; run seed_social_graph first or pass --username")
+        ctx = BenchmarkContext(viewer, options['password'])
+        allowed = set(options['allow'])
+
+        logging.disable(logging.WARNING)
+        flagged = 0
+        for scenario in SCENARIOS:
+            if options['only'] and not any(scenario.name.startswith(name) for name in options['only']):
+                continue
+            try:
+                _, _, queries = call_scenario(scenario, ctx)
+            except MissingData as e:
+                self.stdout.write(self.style.WARNING(f"{scenario.name}: skipped ({e})"))
+                continue
+
+            accepted = set() if options['strict'] else ACCEPTED_FINDINGS.get(scenario.name, set())
+            problems = []
+            for sql in dict.fromkeys(queries):  # Same statement, same plan
+                if not EXPLAINABLE.match(sql):
+                    continue
+                with transaction.atomic(), connection.cursor() as cursor:
+                    findings = explain(cursor, sql)
+                    transaction.set_rollback(True)
+                for kind, table, detail in findings:
+                    if kind not in accepted and f'{kind}:{table}' not in allowed and kind not in allowed:
+                        problems.append((kind, detail, sql))
+
+            if not problems:
+                self.stdout.write(f"{scenario.name}: ok ({len(queries)} queries)")
+                continue
+            flagged += len(problems)
+            self.stdout.write(self.style.ERROR(f"{scenario.name}: {len(problems)} problem(s)"))
+            for kind, detail, sql in problems:
+                self.stdout.write(f"  {kind:<14} {detail}")
+                self.stdout.write(f"  {'':<14} {sql if options['verbose_sql'] else sql[:160]}")
+
+        if flagged:
+            raise CommandError(f"{flagged} query plan problem(s) found", returncode=1)
+        self.stdout.write(self.style.SUCCESS("All query plans use indexes"))
@@ -0,0 +1,244 @@
+import asyncio
+import io
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from benchmarks.client import HTTPConnection, login, percentile
+
+# Default share of each action in the traffic mix
+DEFAULT_MIX = 'feed=70,comment=15,friend=10,upload=5'
+ACTIONS = ('feed', 'comment', 'friend', 'upload')
+
+# Logins hash a password each, so don't run too many at once
+LOGIN_CONCURRENCY = 8
+
+
+def parse_mix(value):
+    """
+    Parse "feed=70,comment=15" into {'feed': 70.0, 'comment': 15.0}.
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise CommandError(f"Unknown action '{name}'; choose from {', '.join(ACTIONS)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid weight for '{name}': {weight!r}")
+    if not any(mix.values()):
+        raise CommandError("The traffic mix needs at least one positive weight")
+    return mix
+
+
+def make_upload_image():
+    buffer = io.BytesIO()
+    Image.effect_noise((480, 480), 64).convert('RGB').save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class VirtualUser:
+    """
+    One logged-in user on its own keep-alive connection, running actions from the mix.
+    """
+    def __init__(self, connection, username, usernames, image, record):
+        self.connection = connection
+        self.username = username
+        self.usernames = usernames
+        self.image = image
+        self.record = record
+        self.post_ids = []
+
+    async def call(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            if method == 'JSON':
+                response = await self.connection.post_json(path, kwargs['data'])
+            elif method == 'MULTIPART':
+                response = await self.connection.post_multipart(path, kwargs['fields'], kwargs['files'])
+            else:
+                response = await self.connection.request(method, path)
+            status = response.status
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            response, status = None, None
+        self.record(endpoint, (time.perf_counter() - start) * 1000, status)
+        return response
+
+    async def feed(self):
+        response = await self.call('feed', 'GET', '/api/posts/feed/?limit=20')
+        if response is not None and response.status == 200:
+            self.post_ids = [post['id'] for post in response.json()['posts']] or self.post_ids
+
+    async def comment(self):
+        if not self.post_ids:
+            return await self.feed()
+        post_id = random.choice(self.post_ids)
+        await self.call('comment', 'JSON', f'/api/posts/{post_id}/comments/create/', data={'text': 'Load test comment'})
+
+    async def friend(self):
+        if random.random() < 0.5:
+            target = random.choice(self.usernames)
+            if target != self.username:
+                await self.call('friend_request', 'JSON', '/api/friends/request/', data={'username': target})
+            return
+        response = await self.call('friend_requests', 'GET', '/api/friends/requests/')
+        if response is not None and response.status == 200:
+            pending = response.json()
+            if pending:
+                await self.call('friend_accept', 'PUT', f"/api/friends/accept/{pending[0]['id']}/")
+
+    async def upload(self):
+        await self.call(
+            'upload', 'MULTIPART', '/api/posts/',
+            fields={'caption': 'Load test post'},
+            files={'image': ('load.jpg', 'image/jpeg', self.image)},
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive a mix of feed reads, post uploads, comments and friend actions against a running '
+        'server with many logged-in users (see seed_social_graph), then report throughput, '
+        'p50/p95/p99 latency and error rate per endpoint. Run it against a throwaway stack: '
+        'it creates posts, comments and friendships.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='Server to test, e.g. http://localhost:8000')
+        parser.add_argument('--users', type=int, default=50, help='Concurrent virtual users')
+        parser.add_argument('--prefix', default='bench_', help='Virtual users log in as <prefix>0, <prefix>1, ...')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Action weights (default: {DEFAULT_MIX})')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run after ramp-up')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which virtual users start')
+        parser.add_argument('--think-time', type=float, default=0, help='Mean pause between actions, in seconds')
+        parser.add_argument('--seed', type=int, help='Random seed for a repeatable action sequence')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--compare', help='Results JSON from an earlier run to compare with')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+        try:
+            samples, elapsed, users = asyncio.run(self.run(options, mix))
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        results = self.summarize(samples, elapsed)
+        results['config'] = {
+            key: options[key] for key in ('base_url', 'users', 'mix', 'duration', 'ramp_up', 'think_time')
+        }
+        results['config']['logged_in_users'] = users
+        self.report(results)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.report_comparison(json.load(f), results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved results to {options['output']}")
+
+    async def run(self, options, mix):
+        usernames = [f"{options['prefix']}{i}" for i in range(options['users'])]
+        semaphore = asyncio.Semaphore(LOGIN_CONCURRENCY)
+
+        async def log_in(username):
+            async with semaphore:
+                return await login(options['base_url'], username, options['password'])
+
+        self.stdout.write(f"Logging in {len(usernames)} users...")
+        results = await asyncio.gather(*(log_in(username) for username in usernames), return_exceptions=True)
+        logged_in = [(username, cookies) for username, cookies in zip(usernames, results) if isinstance(cookies, dict)]
+        failures = [error for error in results if isinstance(error, BaseException)]
+        if not logged_in:
+            raise ValueError(f"No user could log in: {failures[0]}")
+        if failures:
+            self.stderr.write(
+                f"{len(failures)} of {len(usernames)} logins failed (first: {failures[0]}); "
+                f"running with {len(logged_in)} users"
+            )
+
+        samples = []
+        image = make_upload_image()
+        actions, weights = zip(*mix.items())
+
+        def record(endpoint, latency, status):
+            samples.append((endpoint, latency, status))
+
+        start = time.monotonic()
+        deadline = start + options['ramp_up'] + options['duration']
+
+        async def run_user(index, username, cookies):
+            await asyncio.sleep(options['ramp_up'] * index / len(logged_in))
+            connection = HTTPConnection(options['base_url'], cookies=cookies)
+            user = VirtualUser(connection, username, usernames, image, record)
+            try:
+                while time.monotonic() < deadline:
+                    await getattr(user, random.choices(actions, weights)[0])()
+                    if options['think_time']:
+                        await asyncio.sleep(random.expovariate(1 / options['think_time']))
+            finally:
+                await connection.close()
+
+        await asyncio.gather(*(
+            run_user(index, username, cookies)
+            for index, (username, cookies) in enumerate(logged_in)
+        ))
+        return samples, time.monotonic() - start, len(logged_in)
+
+    def summarize(self, samples, elapsed):
+        endpoints = {}
+        for endpoint in sorted({endpoint for endpoint, _, _ in samples}):
+            rows = [(latency, status) for name, latency, status in samples if name == endpoint]
+            latencies = sorted(latency for latency, _ in rows)
+            # Transport failures and 5xx are errors; 4xx (rate limits, duplicate requests) are counted apart
+            errors = sum(1 for _, status in rows if status is None or status >= 500)
+            rejected = sum(1 for _, status in rows if status is not None and 400 <= status < 500)
+            endpoints[endpoint] = {
+                'requests': len(rows),
+                'throughput': round(len(rows) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50), 1),
+                'p95_ms': round(percentile(latencies, 0.95), 1),
+                'p99_ms': round(percentile(latencies, 0.99), 1),
+                'error_rate': round(errors / len(rows), 4),
+                'rejected_rate': round(rejected / len(rows), 4),
+            }
+        return {
+            'elapsed': round(elapsed, 1),
+            'throughput': round(len(samples) / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<16} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7} {'4xx':>7}"
+        )
+        for endpoint, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<16} {row['requests']:>9} {row['throughput']:>8.1f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>7.2%} {row['rejected_rate']:>7.2%}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {results['throughput']:.1f} req/s over {results['elapsed']:.1f}s"
+        ))
+
+    def report_comparison(self, before, after):
+        self.stdout.write(f"\n{'endpoint':<16} {'req/s':>16} {'p95 ms':>18} {'errors':>18}")
+        for endpoint, row in after['endpoints'].items():
+            old = before.get('endpoints', {}).get(endpoint)
+            if old is None:
+                continue
+            self.stdout.write(
+                f"{endpoint:<16} {old['throughput']:>7.1f} -> {row['throughput']:<6.1f} "
+                f"{old['p95_ms']:>8.1f} -> {row['p95_ms']:<7.1f} "
+                f"{old['error_rate']:>7.2%} -> {row['error_rate']:<7.2%}"
+            )
+        self.stdout.write(f"Total req/s: {before['throughput']:.1f} -> {after['throughput']:.1f}")
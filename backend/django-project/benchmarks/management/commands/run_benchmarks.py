@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.client import percentile
+from benchmarks.suite import SCENARIOS, BenchmarkContext, MissingData, pick_viewer, run_scenario
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), '..', '..', 'baseline.json')
+
+# Latency differences below this are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 2.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure latency and query count of every posts, friendships, profiles and accounts endpoint '
+        'against the seeded data (see seed_social_graph) and compare with a stored baseline. '
+        'Exits with status 1 when an endpoint regressed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to act as (default: the seeded user with the most friends)')
+        parser.add_argument('--password', default='benchpass123', help='Password of that user, for the login endpoint')
+        parser.add_argument('--prefix', default='bench_', help='Username prefix used by seed_social_graph')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', action='append', help='Scenario name prefix to run, e.g. posts. (repeatable)')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 latency increase (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        if options['username']:
+            viewer = User.objects.filter(username=options['username']).first()
+        else:
+            viewer = pick_viewer(options['prefix'])
+        if viewer is None:
+            raise CommandError("No benchmark user found; run seed_social_graph first or pass --username")
+
+        ctx = BenchmarkContext(viewer, options['password'])
+        self.stdout.write(f"Benchmarking as {viewer.username} ({len(ctx.post_ids)} recent feed posts sampled)")
+
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or any(scenario.name.startswith(name) for name in options['only'])
+        ]
+        results = {}
+        # Keep 404/slow-request log lines from interleaving with the table
+        logging.disable(logging.WARNING)
+        self.stdout.write(f"{'endpoint':<26} {'status':>6} {'queries':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for scenario in scenarios:
+            try:
+                latencies, queries, status = run_scenario(scenario, ctx, options['iterations'], options['warmup'])
+            except MissingData as e:
+                self.stdout.write(self.style.WARNING(f"{scenario.name:<26} skipped: {e}"))
+                continue
+            results[scenario.name] = {
+                'status': status,
+                'queries': queries,
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+            }
+            self.stdout.write(
+                f"{scenario.name:<26} {status:>6} {queries:>8} "
+                f"{results[scenario.name]['p50_ms']:>9.2f} {results[scenario.name]['p95_ms']:>9.2f}"
+            )
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write("No baseline to compare against; rerun with --save-baseline to store one")
+            return
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+
+        regressions = self.compare(results, baseline, options['tolerance'])
+        for message in regressions:
+            self.stdout.write(self.style.ERROR(message))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}", returncode=1)
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['status'] != before['status']:
+                regressions.append(f"{name}: status {before['status']} -> {result['status']}")
+            if result['queries'] > before['queries']:
+                regressions.append(f"{name}: queries {before['queries']} -> {result['queries']}")
+            slower = result['p50_ms'] - before['p50_ms']
+            if slower > MIN_LATENCY_DELTA_MS and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p50 {before['p50_ms']:.2f}ms -> {result['p50_ms']:.2f}ms")
+        return regressions
@@ -0,0 +1,213 @@
+import io
+import os
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from backend.bulk import timestamps_from_values
+from friendships.models import Friendship
+from posts.models import Post, Comment
+from profiles.models import Profile
+
+# Same limits the API enforces
+MAX_FRIENDS = 5000
+MAX_POSTS = 1000
+
+BATCH_SIZE = 2000
+PLACEHOLDER_IMAGE = 'bench_placeholder.jpg'
+
+
+def make_jpeg(color, size):
+    buffer = io.BytesIO()
+    Image.new('RGB', (size, size), color).save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic social graph (users, power-law friendships, posts, comments, avatars) '
+        'for benchmarks. Users are named <prefix><n> and share one password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--max-friends', type=int, default=MAX_FRIENDS, help=f'Degree cap (at most {MAX_FRIENDS})')
+        parser.add_argument('--alpha', type=float, default=1.5, help='Power-law exponent of the friend count distribution')
+        parser.add_argument('--pending-ratio', type=float, default=0.1, help='Share of friendships left pending')
+        parser.add_argument('--posts-per-user', type=float, default=20, help='Mean posts per user')
+        parser.add_argument('--comments-per-post', type=float, default=2, help='Mean comments per post')
+        parser.add_argument('--avatar-ratio', type=float, default=0.5, help='Share of users with a profile picture')
+        parser.add_argument('--days', type=int, default=90, help='Spread post timestamps over this many days')
+        parser.add_argument('--prefix', default='bench_')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help='Delete existing users with the prefix first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        max_friends = min(options['max_friends'], MAX_FRIENDS, options['users'] - 1)
+        if max_friends < 1:
+            raise CommandError("Need at least 2 users")
+
+        existing = User.objects.filter(username__startswith=prefix)
+        if existing.exists():
+            if not options['clear']:
+                raise CommandError(f"Users starting with '{prefix}' already exist; pass --clear to replace them")
+            self.stdout.write(f"Deleting {existing.count()} existing users...")
+            existing.delete()
+
+        with transaction.atomic(), timestamps_from_values(User, Profile, Friendship, Post, Comment):
+            users = self.create_users(rng, options)
+            adjacency = self.create_friendships(rng, users, max_friends, options)
+            posts = self.create_posts(rng, users, options)
+            self.create_comments(rng, users, posts, adjacency, options)
+
+        self.write_placeholder_image()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users; log in as {prefix}0 .. {prefix}{len(users) - 1} "
+            f"with password '{options['password']}'"
+        ))
+
+    def create_users(self, rng, options):
+        now = timezone.now()
+        password = make_password(options['password'])  # Hash once; every user shares it
+        users = User.objects.bulk_create([
+            User(
+                username=f"{options['prefix']}{i}",
+                email=f"{options['prefix']}{i}@example.com",
+                password=password,
+                date_joined=now,
+            )
+            for i in range(options['users'])
+        ], batch_size=BATCH_SIZE)
+        # bulk_create doesn't return ids on every backend, so reload them
+        users = list(User.objects.filter(username__startswith=options['prefix']).order_by('id'))
+
+        avatars = [make_jpeg(color, 128) for color in ('#3b82f6', '#ef4444', '#10b981', '#f59e0b')]
+        Profile.objects.bulk_create([
+            Profile(
+                user=user,
+                display_name=f"Bench User {user.username[len(options['prefix']):]}",
+                profile_picture=rng.choice(avatars) if rng.random() < options['avatar_ratio'] else None,
+                created_at=now,
+                updated_at=now,
+            )
+            for user in users
+        ], batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(users)} users and profiles")
+        return users
+
+    def create_friendships(self, rng, users, max_friends, options):
+        """
+        Draw each user's target friend count from a power law, then connect
+        users preferentially by target count (a configuration-model graph).
+        """
+        targets = [
+            min(max_friends, max(1, int(rng.paretovariate(options['alpha']))))
+            for _ in users
+        ]
+        degree = [0] * len(users)
+        edges = set()
+        indexes = list(range(len(users)))
+
+        for i in sorted(indexes, key=lambda i: targets[i], reverse=True):
+            wanted = targets[i] - degree[i]
+            if wanted <= 0:
+                continue
+            candidates = rng.choices(indexes, weights=targets, k=wanted * 2)
+            for j in candidates:
+                if degree[i] >= targets[i]:
+                    break
+                if j == i or degree[j] >= max_friends:
+                    continue
+                edge = (min(i, j), max(i, j))
+                if edge in edges:
+                    continue
+                edges.add(edge)
+                degree[i] += 1
+                degree[j] += 1
+
+        now = timezone.now()
+        adjacency = [[] for _ in users]
+        friendships = []
+        for i, j in edges:
+            user1, user2 = users[i], users[j]  # users are ordered by id, so user1.id < user2.id
+            accepted = rng.random() >= options['pending_ratio']
+            if accepted:
+                adjacency[i].append(j)
+                adjacency[j].append(i)
+            created = now - timedelta(days=rng.uniform(0, options['days']))
+            friendships.append(Friendship(
+                user1=user1,
+                user2=user2,
+                status='accepted' if accepted else 'pending',
+                requester=rng.choice((user1, user2)),
+                created_at=created,
+                updated_at=created,
+            ))
+        Friendship.objects.bulk_create(friendships, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(friendships)} friendships (max degree {max(degree)})")
+        return adjacency
+
+    def create_posts(self, rng, users, options):
+        now = timezone.now()
+        posts = []
+        for index, user in enumerate(users):
+            count = min(MAX_POSTS, int(rng.expovariate(1 / options['posts_per_user'])) if options['posts_per_user'] else 0)
+            for _ in range(count):
+                created = now - timedelta(seconds=rng.uniform(0, options['days'] * 86400))
+                post = Post(
+                    user=user,
+                    image_path=PLACEHOLDER_IMAGE,
+                    caption=f"Synthetic post {rng.randrange(10 ** 6)}",
+                    created_at=created,
+                    updated_at=created,
+                )
+                post.owner_index = index
+                posts.append(post)
+        Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(posts)} posts")
+        return posts
+
+    def create_comments(self, rng, users, posts, adjacency, options):
+        if not options['comments_per_post'] or not posts:
+            return
+        # Posts need their ids; reload this run's posts in creation order when the backend didn't return them
+        if posts[0].pk is None:
+            ids = Post.objects.filter(user__in=users).order_by('id').values_list('id', flat=True)
+            for post, post_id in zip(posts, ids):
+                post.pk = post.id = post_id
+
+        comments = []
+        for post in posts:
+            friends = adjacency[post.owner_index]
+            count = int(rng.expovariate(1 / options['comments_per_post']))
+            for _ in range(count):
+                author_index = rng.choice(friends) if friends and rng.random() < 0.8 else post.owner_index
+                created = post.created_at + timedelta(seconds=rng.uniform(60, 86400))
+                comments.append(Comment(
+                    post_id=post.id,
+                    user_id=users[author_index].id,
+                    comment_text=f"Synthetic comment {rng.randrange(10 ** 6)}",
+                    created_at=created,
+                ))
+            if len(comments) >= BATCH_SIZE * 5:
+                Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+                comments = []
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        self.stdout.write("Created comments")
+
+    def write_placeholder_image(self):
+        os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+        path = os.path.join(settings.MEDIA_ROOT, PLACEHOLDER_IMAGE)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(make_jpeg('#6366f1', 640))
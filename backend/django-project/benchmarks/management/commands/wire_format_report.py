@@ -0,0 +1,61 @@
+import gzip
+import json
+import statistics
+import time
+
+import msgpack
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+
+ENDPOINTS = {
+    'feed': '/api/posts/feed/?limit=50',
+    'friends': '/api/friends/',
+}
+
+FORMATS = {
+    'json': ('application/json', json.loads),
+    'msgpack': ('application/msgpack', lambda body: msgpack.unpackb(body, raw=False)),
+}
+
+# Matches gzip_comp_level in frontend/nginx.conf
+GZIP_LEVEL = 5
+
+
+class Command(BaseCommand):
+    help = 'Compare bytes-on-wire and decode time of JSON vs MessagePack API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose feed and friends list are rendered')
+        parser.add_argument('--iterations', type=int, default=50, help='Decode iterations per payload')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' not found")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        self.stdout.write(f"{'endpoint':<10} {'format':<8} {'bytes':>10} {'gzip':>10} {'decode ms':>10}")
+        for name, url in ENDPOINTS.items():
+            for fmt, (media_type, decode) in FORMATS.items():
+                response = client.get(url, HTTP_ACCEPT=media_type)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+
+                body = response.content
+                compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+                timings = []
+                for _ in range(options['iterations']):
+                    start = time.perf_counter()
+                    decode(body)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                self.stdout.write(
+                    f"{name:<10} {fmt:<8} {len(body):>10} {len(compressed):>10} "
+                    f"{statistics.median(timings):>10.3f}"
+                )
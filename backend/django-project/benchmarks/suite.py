@@ -0,0 +1,285 @@
+"""
+Endpoint benchmark suite run in-process with the Django test client.
+
+Each scenario is one API call made as a benchmark user against the current
+database (see the seed_social_graph command). Every iteration runs inside a
+transaction that is rolled back, so write endpoints can be measured over and
+over without changing the data. Latency and query count are recorded per call.
+"""
+import io
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.http.request import split_domain_port, validate_host
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from friendships.models import Friendship
+from friendships.utils import get_friend_ids
+from posts.models import Post, Comment
+
+
+def make_image(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', (size, size), '#6366f1').save(buffer, format='JPEG')
+    buffer.seek(0)
+    buffer.name = 'bench.jpg'
+    return buffer
+
+
+class MissingData(Exception):
+    """
+    The seeded data lacks a row a scenario needs (e.g. the viewer has no friends).
+    """
+
+
+class Scenario:
+    """
+    One endpoint call. `build(ctx)` runs inside the rolled-back transaction,
+    may create the rows the call needs, and returns the request kwargs.
+    """
+    def __init__(self, name, method, build, authenticated=True, cleanup=None):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.authenticated = authenticated
+        self.cleanup = cleanup
+
+
+class BenchmarkContext:
+    """
+    The viewer the suite acts as, plus a few related users and rows to call endpoints with.
+    """
+    def __init__(self, viewer, password):
+        self.viewer = viewer
+        self.password = password
+        self.refresh_token = RefreshToken.for_user(viewer)
+        self.access_token = str(self.refresh_token.access_token)
+
+        friend_ids = get_friend_ids(viewer)
+        related_ids = self._related_ids(viewer)
+        friends = User.objects.filter(id__in=friend_ids).order_by('id')
+        # Prefer a friend with a picture so the picture endpoint returns one
+        self.friend = friends.filter(profile__profile_picture__isnull=False).first() or friends.first()
+        self.stranger = User.objects.exclude(id__in=related_ids | {viewer.id}).order_by('id').first()
+        self.friend_post = Post.objects.filter(user_id__in=friend_ids).order_by('-created_at').first()
+        self.own_post = Post.objects.filter(user=viewer).order_by('-created_at').first()
+        self.post_ids = list(
+            Post.objects.filter(user_id__in=friend_ids).order_by('-created_at').values_list('id', flat=True)[:50]
+        )
+        self.friend_usernames = list(
+            User.objects.filter(id__in=friend_ids).order_by('id').values_list('username', flat=True)[:50]
+        )
+
+    @staticmethod
+    def _related_ids(user):
+        """
+        Ids of every user with any friendship row (pending or accepted) with `user`.
+        """
+        pairs = Friendship.objects.filter(Q(user1=user) | Q(user2=user)).values_list('user1_id', 'user2_id')
+        return {user2_id if user1_id == user.id else user1_id for user1_id, user2_id in pairs}
+
+    def create_own_post(self):
+        """
+        A fresh post of the viewer's. Its image file doesn't exist: deleting the post enqueues
+        a job to remove the file, and the rolled-back transaction never runs it.
+        """
+        filename = f'bench_{self.viewer.id}_{time.perf_counter_ns()}.jpg'
+        return Post.objects.create(user=self.viewer, image_path=filename, caption='Benchmark post')
+
+    def create_pending(self, requester):
+        user1, user2 = sorted((self.viewer, self.stranger), key=lambda user: user.id)
+        return Friendship.objects.create(user1=user1, user2=user2, requester=requester, status='pending')
+
+
+def remove_created_image(ctx, response):
+    if response.status_code == 201:
+        path = os.path.join(settings.MEDIA_ROOT, response.json()['image_path'])
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def allow_new_post(ctx):
+    # Step around the one-post-per-5-minutes limit
+    Post.objects.filter(
+        user=ctx.viewer, created_at__gte=timezone.now() - timedelta(minutes=5)
+    ).update(created_at=timezone.now() - timedelta(hours=1))
+    return {'path': '/api/posts/', 'data': {'image': make_image(256), 'caption': 'Benchmark'}}
+
+
+def create_friend_comment(ctx):
+    comment = Comment.objects.create(post=ctx.friend_post, user=ctx.viewer, comment_text='Benchmark')
+    return {'path': f'/api/posts/comments/{comment.id}/delete/'}
+
+
+def send_request(ctx):
+    return {
+        'path': '/api/friends/request/',
+        'data': {'username': ctx.stranger.username},
+        'content_type': 'application/json',
+    }
+
+
+def register(ctx):
+    return {
+        'path': '/account/register',
+        'data': {'username': f'bench_new_{time.perf_counter_ns()}', 'email': 'new@example.com', 'password': 'benchpass123'},
+        'content_type': 'application/json',
+    }
+
+
+SCENARIOS = [
+    # posts
+    Scenario('posts.feed', 'get', lambda ctx: {'path': '/api/posts/feed/?limit=20'}),
+    Scenario('posts.feed_changes', 'get', lambda ctx: {
+        'path': '/api/posts/feed/since/?watermark=' + ctx.client.get('/api/posts/feed/?limit=1').json()['watermark']
+    }),
+    Scenario('posts.get_post', 'get', lambda ctx: {'path': f'/api/posts/{ctx.friend_post.id}/'}),
+    Scenario('posts.batch', 'get', lambda ctx: {
+        'path': '/api/posts/batch/?ids=' + ','.join(map(str, ctx.post_ids))
+    }),
+    Scenario('posts.my_posts', 'get', lambda ctx: {'path': '/api/posts/me/'}),
+    Scenario('posts.user_posts', 'get', lambda ctx: {'path': f'/api/posts/user/{ctx.friend.username}/'}),
+    Scenario('posts.comments', 'get', lambda ctx: {'path': f'/api/posts/{ctx.friend_post.id}/comments/'}),
+    Scenario('posts.create', 'post', allow_new_post, cleanup=remove_created_image),
+    Scenario('posts.update', 'put', lambda ctx: {
+        'path': f'/api/posts/{(ctx.own_post or ctx.create_own_post()).id}/update/',
+        'data': {'caption': 'Updated by benchmark'},
+        'content_type': 'application/json',
+    }),
+    Scenario('posts.delete', 'delete', lambda ctx: {'path': f'/api/posts/{ctx.create_own_post().id}/delete/'}),
+    Scenario('posts.create_comment', 'post', lambda ctx: {
+        'path': f'/api/posts/{ctx.friend_post.id}/comments/create/',
+        'data': {'text': 'Benchmark comment'},
+        'content_type': 'application/json',
+    }),
+    Scenario('posts.delete_comment', 'delete', create_friend_comment),
+
+    # friendships
+    Scenario('friends.list', 'get', lambda ctx: {'path': '/api/friends/'}),
+    Scenario('friends.requests', 'get', lambda ctx: {'path': '/api/friends/requests/'}),
+    Scenario('friends.sent', 'get', lambda ctx: {'path': '/api/friends/sent/'}),
+    Scenario('friends.status', 'get', lambda ctx: {
+        'path': '/api/friends/status/?usernames=' + ','.join(ctx.friend_usernames + [ctx.stranger.username])
+    }),
+    Scenario('friends.send_request', 'post', send_request),
+    Scenario('friends.accept', 'put', lambda ctx: {
+        'path': f'/api/friends/accept/{ctx.create_pending(ctx.stranger).id}/'
+    }),
+    Scenario('friends.decline', 'delete', lambda ctx: {
+        'path': f'/api/friends/decline/{ctx.create_pending(ctx.stranger).id}/'
+    }),
+    Scenario('friends.cancel', 'delete', lambda ctx: {
+        'path': f'/api/friends/cancel/{ctx.create_pending(ctx.viewer).id}/'
+    }),
+    Scenario('friends.remove', 'delete', lambda ctx: {
+        'path': '/api/friends/{}/'.format(
+            Friendship.objects.filter(Q(user1=ctx.viewer, user2=ctx.friend) | Q(user1=ctx.friend, user2=ctx.viewer)).get().id
+        )
+    }),
+
+    # profiles
+    Scenario('profiles.me', 'get', lambda ctx: {'path': '/api/profile/me/'}),
+    Scenario('profiles.update', 'put', lambda ctx: {
+        'path': '/api/profile/me/',
+        'data': {'bio': 'Updated by benchmark'},
+        'content_type': 'application/json',
+    }),
+    Scenario('profiles.by_username', 'get', lambda ctx: {'path': f'/api/profile/{ctx.friend.username}/'}),
+    Scenario('profiles.batch', 'get', lambda ctx: {
+        'path': '/api/profile/batch/?usernames=' + ','.join(ctx.friend_usernames)
+    }),
+    Scenario('profiles.picture', 'get', lambda ctx: {'path': f'/api/profile/picture/{ctx.friend.username}/'}),
+    Scenario('profiles.upload_picture', 'post', lambda ctx: {
+        'path': '/api/profile/picture/', 'data': {'image': make_image(128)}
+    }),
+
+    # accounts
+    Scenario('accounts.token', 'post', lambda ctx: {
+        'path': '/account/token',
+        'data': {'username': ctx.viewer.username, 'password': ctx.password},
+        'content_type': 'application/json',
+    }, authenticated=False),
+    Scenario('accounts.refresh', 'post', lambda ctx: {'path': '/account/token/refresh'}),
+    Scenario('accounts.authenticated', 'post', lambda ctx: {'path': '/account/authenticated'}),
+    Scenario('accounts.logout', 'post', lambda ctx: {'path': '/account/logout'}),
+    Scenario('accounts.register', 'post', register, authenticated=False),
+]
+
+
+def pick_viewer(prefix):
+    """
+    The benchmark user with the most accepted friends, i.e. the heaviest feed.
+    """
+    return (
+        User.objects.filter(username__startswith=prefix)
+        .annotate(friend_count=(
+            Count('friendships_initiated', filter=Q(friendships_initiated__status='accepted'), distinct=True)
+            + Count('friendships_received', filter=Q(friendships_received__status='accepted'), distinct=True)
+        ))
+        .order_by('-friend_count', 'id')
+        .first()
+    )
+
+
+def request_host():
+    """
+    A Host header the current settings accept (production settings reject "testserver").
+    """
+    for host in ['testserver', *settings.ALLOWED_HOSTS]:
+        domain, _ = split_domain_port(host)
+        if domain and validate_host(domain, settings.ALLOWED_HOSTS):
+            return host
+    return 'testserver'
+
+
+def call_scenario(scenario, ctx):
+    """
+    Make one call inside a rolled-back transaction.
+    Returns the response, its latency (ms) and the queries it ran.
+    """
+    client = Client(raise_request_exception=False, HTTP_HOST=request_host())
+    if scenario.authenticated:
+        client.cookies['access_token'] = ctx.access_token
+        client.cookies['refresh_token'] = str(ctx.refresh_token)
+    ctx.client = client
+
+    with transaction.atomic():
+        try:
+            kwargs = scenario.build(ctx)
+        except (AttributeError, ObjectDoesNotExist) as e:
+            raise MissingData(str(e))
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(**kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+        transaction.set_rollback(True)
+
+    if scenario.cleanup:
+        scenario.cleanup(ctx, response)
+    return response, elapsed, [query['sql'] for query in captured.captured_queries]
+
+
+def run_scenario(scenario, ctx, iterations, warmup):
+    """
+    Call one endpoint `warmup + iterations` times and return per-call
+    latencies (ms), the query count of the last call and its status code.
+    """
+    latencies = []
+    queries = status = None
+    for iteration in range(warmup + iterations):
+        response, elapsed, sql = call_scenario(scenario, ctx)
+        if iteration >= warmup:
+            latencies.append(elapsed)
+        queries = len(sql)
+        status = response.status_code
+    return sorted(latencies), queries, status
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friendships', '0002_friendship_user2_status_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='friendship',
+            name='friendships_user2_i_7c1b39_idx',
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user1', 'status', '-updated_at'], name='friendships_user1_i_8af229_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user2', 'status', '-updated_at'], name='friendships_user2_i_44c47d_idx'),
+        ),
+    ]
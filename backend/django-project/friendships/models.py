@@ -1,9 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from backend.dirty import DirtyFieldsMixin
 
 
-class Friendship(models.Model):
+class Friendship(DirtyFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('accepted', 'Accepted'),
@@ -20,6 +21,9 @@ class Friendship(models.Model):
         unique_together = ['user1', 'user2']
         indexes = [
             models.Index(fields=['user1', 'user2', 'status']),
+            # Each side of (user1=X OR user2=X) lookups, newest first for the friends list
+            models.Index(fields=['user1', 'status', '-updated_at']),
+            models.Index(fields=['user2', 'status', '-updated_at']),
         ]
         db_table = 'friendships'
     
@@ -27,14 +31,14 @@ class Friendship(models.Model):
         return f"{self.user1.username} <-> {self.user2.username} ({self.status})"
     
     def clean(self):
-        # Ensure user1 and user2 are different
-        if self.user1 == self.user2:
+        # Ensure user1 and user2 are different (ids, so the users aren't loaded)
+        if self.user1_id == self.user2_id:
             raise ValidationError("Cannot be friends with yourself")
         
         # Ensure user1.id < user2.id for consistency (normalize friendship)
-        if self.user1.id > self.user2.id:
-            self.user1, self.user2 = self.user2, self.user1
+        if self.user1_id > self.user2_id:
+            self.user1_id, self.user2_id = self.user2_id, self.user1_id
     
     def save(self, *args, **kwargs):
-        self.full_clean()
+        self.clean_changed()
         super().save(*args, **kwargs)
@@ -1,15 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from monitoring.serializers import TimedListSerializer, TimedSerializerMixin
 from .models import Friendship
 
 
-class FriendSerializer(serializers.ModelSerializer):
+class FriendSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField()
     display_name = serializers.CharField(source='profile.display_name', read_only=True)
     profile_picture_base64 = serializers.SerializerMethodField()
     
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'display_name', 'profile_picture_base64']
     
     def get_profile_picture_base64(self, obj):
@@ -19,12 +21,13 @@ class FriendSerializer(serializers.ModelSerializer):
         return None
 
 
-class FriendshipSerializer(serializers.ModelSerializer):
+class FriendshipSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     friend = serializers.SerializerMethodField()
     requester_username = serializers.CharField(source='requester.username', read_only=True)
     
     class Meta:
         model = Friendship
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'friend', 'status', 'requester_username', 'created_at']
     
     def get_friend(self, obj):
@@ -37,9 +40,10 @@ class FriendshipSerializer(serializers.ModelSerializer):
         return FriendSerializer(friend).data
 
 
-class FriendRequestSerializer(serializers.ModelSerializer):
+class FriendRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     requester = FriendSerializer(read_only=True)
     
     class Meta:
         model = Friendship
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'requester', 'created_at']
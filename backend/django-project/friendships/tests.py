@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from profiles.models import Profile
+from .models import Friendship
+
+
+class FriendsListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        for i, name in enumerate(['Zoe', 'Bob', 'Carol', 'Bea', 'Dan']):
+            friend = User.objects.create_user(f'friend{i}')
+            Profile.objects.filter(user=friend).update(display_name=name)
+            Friendship.objects.create(user1=self.user, user2=friend, status='accepted', requester=self.user)
+        stranger = User.objects.create_user('bobby', password='password123')
+        Friendship.objects.create(user1=self.user, user2=stranger, status='pending', requester=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.total = 5
+
+    def pages(self, **params):
+        names, cursor = [], None
+        while True:
+            response = self.client.get('/api/friends/', {**params, 'limit': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['total'], self.total)  # All friends, even with ?q=
+            names.append([f['friend']['display_name'] for f in response.data['friends']])
+            cursor = response.data['next']
+            if not cursor:
+                return names
+
+    def test_pages_by_name_and_date(self):
+        self.assertEqual(self.pages(), [['Bea', 'Bob'], ['Carol', 'Dan'], ['Zoe']])
+        self.assertEqual(self.pages(sort='date'), [['Dan', 'Bea'], ['Carol', 'Bob'], ['Zoe']])
+
+    def test_prefix_filter_and_bad_input(self):
+        self.assertEqual(self.pages(q='b'), [['Bea', 'Bob']])
+        self.assertEqual(self.pages(sort='date', q='FRIEND0'), [['Zoe']])
+        self.assertEqual(self.client.get('/api/friends/', {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/friends/', {'sort': 'age'}).status_code, 400)
+
+    def test_deleted_friends_not_counted(self):
+        # Soft-deleted, friendship not purged yet
+        User.objects.filter(username='friend0').update(is_active=False)
+        self.total = 4
+        self.assertEqual(self.pages(), [['Bea', 'Bob'], ['Carol', 'Dan']])
+
+
+class FriendshipSaveTests(TestCase):
+    def test_accept_skips_validation_queries(self):
+        alice = User.objects.create_user('alice')
+        bob = User.objects.create_user('bob')
+        # Normalized to user1 < user2 without loading either user
+        Friendship.objects.create(user1=bob, user2=alice, requester=bob)
+        friendship = Friendship.objects.select_related('user1', 'user2').get()
+        self.assertEqual((friendship.user1_id, friendship.user2_id), (alice.id, bob.id))
+
+        friendship.status = 'accepted'
+        with CaptureQueriesContext(connection) as captured:
+            friendship.save()
+        self.assertEqual(len(captured), 1)  # Just the UPDATE: no foreign key or unique_together checks
+        self.assertEqual(Friendship.objects.get().status, 'accepted')
@@ -5,6 +5,7 @@ urlpatterns = [
     path('', views.get_friends, name='get_friends'),
     path('requests/', views.get_friend_requests, name='get_friend_requests'),
     path('sent/', views.get_sent_requests, name='get_sent_requests'),
+    path('status/', views.get_friendship_statuses, name='friendship_statuses'),
     path('request/', views.send_friend_request, name='send_friend_request'),
     path('accept/<int:friendship_id>/', views.accept_friend_request, name='accept_friend_request'),
     path('decline/<int:friendship_id>/', views.decline_friend_request, name='decline_friend_request'),
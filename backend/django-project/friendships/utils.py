@@ -1,6 +1,15 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import connections, router
 from django.db.models import Q
+from backend.cursor import decode_cursor, encode_cursor
+from profiles.models import Profile
+from search.index import user_prefix_filter
 from .models import Friendship
 
+FRIEND_SORTS = ('name', 'date')
+
 
 def normalize_friendship(user1, user2):
     """
@@ -25,6 +34,55 @@ def get_friendship_status(user1, user2):
         return None
 
 
+def get_friendships_with(user, others):
+    """
+    Get the friendships between `user` and each of `others` in a single query.
+    Returns: dict of other user id -> Friendship (users with no friendship are absent)
+    """
+    other_ids = [other.id for other in others]
+    friendships = Friendship.objects.filter(
+        Q(user1=user, user2_id__in=other_ids) | Q(user2=user, user1_id__in=other_ids)
+    )
+    
+    result = {}
+    for friendship in friendships:
+        other_id = friendship.user2_id if friendship.user1_id == user.id else friendship.user1_id
+        result[other_id] = friendship
+    return result
+
+
+def friends_filter(user, field='user', active_only=True):
+    """
+    Build a Q matching rows whose `field` foreign key points at one of `user`'s
+    accepted friends. Friend ids come from a subquery on the raw user1_id/user2_id
+    columns, so the caller's query stays a single SQL statement.
+    With `active_only`, friends whose account was deleted are left out right away,
+    before purge_user gets to their friendships.
+    """
+    accepted = Friendship.objects.filter(status='accepted')
+    as_user1 = accepted.filter(user1_id=user.id)
+    as_user2 = accepted.filter(user2_id=user.id)
+    if active_only:
+        as_user1 = as_user1.filter(user2__is_active=True)
+        as_user2 = as_user2.filter(user1__is_active=True)
+    return (
+        Q(**{f'{field}_id__in': as_user1.values('user2_id')}) |
+        Q(**{f'{field}_id__in': as_user2.values('user1_id')})
+    )
+
+
+def get_friend_ids(user):
+    """
+    Get the ids of all accepted friends of `user` in a single query.
+    """
+    accepted = Friendship.objects.filter(status='accepted')
+    return list(
+        accepted.filter(user1_id=user.id).values_list('user2_id', flat=True).union(
+            accepted.filter(user2_id=user.id).values_list('user1_id', flat=True)
+        )
+    )
+
+
 def are_friends(user1, user2):
     """
     Check if two users are friends (accepted friendship).
@@ -32,14 +90,17 @@ def are_friends(user1, user2):
     return get_friendship_status(user1, user2) == 'accepted'
 
 
-def get_friend_count(user):
+def get_friend_count(user, active_only=False):
     """
     Get the number of accepted friendships for a user.
+    With `active_only`, friends whose account was deleted aren't counted,
+    matching what friends_page lists.
     """
-    return Friendship.objects.filter(
-        Q(user1=user) | Q(user2=user),
-        status='accepted'
-    ).count()
+    if active_only:
+        involved = Q(user1=user, user2__is_active=True) | Q(user2=user, user1__is_active=True)
+    else:
+        involved = Q(user1=user) | Q(user2=user)
+    return Friendship.objects.filter(involved, status='accepted').count()
 
 
 def can_add_friend(user):
@@ -47,3 +108,54 @@ def can_add_friend(user):
     Check if user can add more friends (max 5000).
     """
     return get_friend_count(user) < 5000
+
+
+def friends_page(user, sort='name', prefix='', cursor=None, limit=50):
+    """
+    Get one page of `user`'s accepted friendships, sorted by the friend's display name
+    or by when the friendship was accepted (newest first), optionally only friends whose
+    username or display name starts with `prefix`. Pages are keyset-paginated, so every
+    page is a range scan on an index however far the client has scrolled.
+    Returns: (friendships, cursor for the next page or None)
+    Raises ValueError with a client-facing message on a bad cursor.
+    """
+    matches = None
+    if prefix:
+        connection = connections[router.db_for_read(User)]
+        matches = User.objects.filter(user_prefix_filter(prefix, connection)).values('id')
+    related = ('user1', 'user2', 'user1__profile', 'user2__profile', 'requester')
+
+    if sort == 'date':
+        friendships = Friendship.objects.filter(
+            Q(user1=user, user2__is_active=True) | Q(user2=user, user1__is_active=True), status='accepted'
+        )
+        if matches is not None:
+            friendships = friendships.filter(Q(user1=user, user2_id__in=matches) | Q(user2=user, user1_id__in=matches))
+        if cursor:
+            since, last_id = decode_cursor(cursor, datetime.fromisoformat, int)
+            friendships = friendships.filter(Q(updated_at__lt=since) | Q(updated_at=since, id__lt=last_id))
+        # Sort the narrow (updated_at, id) keys, then load only the page's rows with their users
+        keys = list(friendships.order_by('-updated_at', '-id').values_list('updated_at', 'id')[:limit + 1])
+        next_cursor = encode_cursor(*keys[limit - 1]) if len(keys) > limit else None
+        page_ids = [friendship_id for _, friendship_id in keys[:limit]]
+        by_id = Friendship.objects.select_related(*related).in_bulk(page_ids)
+        return [by_id[friendship_id] for friendship_id in page_ids if friendship_id in by_id], next_cursor
+
+    # Sorted on the friend's profile, so the (display_name, user) index gives the order
+    profiles = Profile.objects.filter(friends_filter(user))
+    if matches is not None:
+        profiles = profiles.filter(user_id__in=matches)
+    if cursor:
+        name, last_id = decode_cursor(cursor, str, int)
+        profiles = profiles.filter(Q(display_name__gt=name) | Q(display_name=name, user_id__gt=last_id))
+    keys = list(profiles.order_by('display_name', 'user_id').values_list('display_name', 'user_id')[:limit + 1])
+    next_cursor = encode_cursor(*keys[limit - 1]) if len(keys) > limit else None
+
+    friend_ids = [friend_id for _, friend_id in keys[:limit]]
+    by_friend = {}
+    for friendship in Friendship.objects.filter(
+        Q(user1=user, user2_id__in=friend_ids) | Q(user2=user, user1_id__in=friend_ids), status='accepted'
+    ).select_related(*related):
+        by_friend[friendship.user2_id if friendship.user1_id == user.id else friendship.user1_id] = friendship
+    # A friendship removed since the first query is skipped
+    return [by_friend[friend_id] for friend_id in friend_ids if friend_id in by_friend], next_cursor
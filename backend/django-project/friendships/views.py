@@ -1,3 +1,5 @@
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -7,24 +9,48 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from .models import Friendship
 from .serializers import FriendshipSerializer, FriendRequestSerializer, FriendSerializer
-from .utils import normalize_friendship, are_friends, can_add_friend, get_friend_count
+from .utils import (
+    normalize_friendship, are_friends, can_add_friend, get_friend_count, get_friendships_with,
+    friends_page, FRIEND_SORTS,
+)
+from backend.batch import parse_batch_param
 
 
-@api_view(['GET'])
+# Friends returned per page of get_friends, by default and at most
+FRIENDS_PAGE_SIZE = 50
+MAX_FRIENDS_PAGE_SIZE = 100
+
+
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_friends(request):
+async def get_friends(request):
     """
-    Get all accepted friends for the current user.
+    Get a page of accepted friends for the current user (?sort=name|date&q=prefix&limit=50).
+    Pass the returned `next` cursor as ?cursor=... to get the following page; it is null on the last page.
+    `total` is the number of all accepted friends, whatever ?q= matches.
     """
-    friendships = Friendship.objects.filter(
-        Q(user1=request.user) | Q(user2=request.user),
-        status='accepted'
-    ).select_related('user1', 'user2', 'user1__profile', 'user2__profile')
+    sort = request.query_params.get('sort', 'name')
+    if sort not in FRIEND_SORTS:
+        return Response({'error': f"sort must be one of {', '.join(FRIEND_SORTS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', FRIENDS_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, MAX_FRIENDS_PAGE_SIZE))
+
+    try:
+        friendships, next_cursor = await sync_to_async(friends_page)(
+            request.user, sort=sort, prefix=request.query_params.get('q', '').strip()[:100],
+            cursor=request.query_params.get('cursor'), limit=limit,
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     serializer = FriendshipSerializer(friendships, many=True, context={'request': request})
     return Response({
         'friends': serializer.data,
-        'count': len(serializer.data)
+        'total': await sync_to_async(get_friend_count)(request.user, active_only=True),
+        'next': next_cursor,
     })
 
 
@@ -61,6 +87,42 @@ def get_sent_requests(request):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_friendship_statuses(request):
+    """
+    Get the friendship status with several users in one request (?usernames=alice,bob).
+    Status is 'accepted', 'pending' or None; unknown usernames are listed in `missing`.
+    """
+    try:
+        usernames = parse_batch_param(request, 'usernames')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    users_by_username = {user.username: user for user in User.objects.filter(username__in=usernames)}
+    users_by_id = {user.id: user for user in users_by_username.values()}
+    users_by_id[request.user.id] = request.user
+    friendships = get_friendships_with(request.user, users_by_username.values())
+    
+    statuses = []
+    for username in usernames:
+        user = users_by_username.get(username)
+        if user is None:
+            continue
+        friendship = friendships.get(user.id)
+        statuses.append({
+            'username': username,
+            'status': friendship.status if friendship else None,
+            'friendship_id': friendship.id if friendship else None,
+            'requester_username': users_by_id[friendship.requester_id].username if friendship else None,
+        })
+    
+    return Response({
+        'statuses': statuses,
+        'missing': [name for name in usernames if name not in users_by_username]
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_friend_request(request):
@@ -117,14 +179,16 @@ def accept_friend_request(request, friendship_id):
     """
     Accept a pending friend request.
     """
-    friendship = get_object_or_404(Friendship, id=friendship_id)
+    friendship = get_object_or_404(
+        Friendship.objects.select_related('user1__profile', 'user2__profile', 'requester'), id=friendship_id
+    )
     
     # Verify user is the recipient of the request (not the requester)
-    if friendship.requester == request.user:
+    if friendship.requester_id == request.user.id:
         return Response({'error': 'Cannot accept your own friend request'}, status=status.HTTP_400_BAD_REQUEST)
     
     # Verify user is part of the friendship
-    if friendship.user1 != request.user and friendship.user2 != request.user:
+    if request.user.id not in (friendship.user1_id, friendship.user2_id):
         return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
     
     # Verify friendship is pending
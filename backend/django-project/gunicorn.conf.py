@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for cyberspace.social
+
+Serves backend.asgi:application with uvicorn workers by default, so async
+read views and slow clients don't tie up a whole worker. Set
+GUNICORN_WORKER_CLASS=sync and serve backend.wsgi:application to run the
+old synchronous setup (e.g. to compare with bench_concurrency).
+"""
+import os
+import shutil
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '3'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+# Only used by the gthread worker class; settings_prod sizes the DB pool from it
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+
+# Restart a worker that stops responding for this many seconds
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+accesslog = '-'
+
+
+# Prometheus multiprocess mode: workers write metric samples to this
+# directory and /metrics merges them. Must be set before workers start.
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    # Start from empty files so counters from a previous run don't linger
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
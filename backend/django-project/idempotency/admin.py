@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'key', 'status', 'response_status', 'created_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    raw_id_fields = ('user',)
+    exclude = ('response_body',)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from idempotency.middleware import key_ttl
+from idempotency.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete idempotency keys older than IDEMPOTENCY_KEY_TTL. Expired keys are never '
+        'replayed either way; this only keeps the table small. Run it from cron, e.g. hourly.'
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - key_ttl()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
@@ -0,0 +1,253 @@
+"""
+Idempotency-Key support for mutating API requests.
+
+A client that may retry a POST/PUT/PATCH/DELETE sends a unique
+Idempotency-Key header (e.g. a UUID) and reuses it on every retry. The
+first request with a key runs the view and its response is stored for
+IDEMPOTENCY_KEY_TTL seconds; retries get that response back, with an
+Idempotent-Replayed header, without the view running again. A retry
+that arrives while the first request is still running waits up to
+IDEMPOTENCY_LOCK_TIMEOUT seconds for it to finish instead of running in
+parallel; a request holding a key longer than that is presumed dead and
+the retry takes the key over.
+
+Keys are per user, taken from the JWT cookie, and bound to the method,
+path and body they were first used with. Reusing one for a different
+request is rejected with 422. 5xx responses, exceptions and streamed
+responses are not stored, so a retry runs the view again.
+"""
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05  # Seconds between checks while waiting for a concurrent duplicate
+CLAIM_ATTEMPTS = 3  # Failed creates with no conflicting row before a key is treated as unusable
+
+# Returned by begin() when a concurrent request holds the key
+BUSY = object()
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+
+def lock_timeout():
+    return getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 30)
+
+
+def request_user_id(request):
+    """
+    The user id in the request's access_token cookie, or None. The token is
+    verified but the user isn't loaded; the view authenticates as usual.
+    """
+    raw = request.COOKIES.get('access_token')
+    if not raw:
+        return None
+    try:
+        return JWTAuthentication().get_validated_token(raw)[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.get_full_path()}\n'.encode())
+    # Multipart boundaries change between retries, and reading a large upload here would
+    # hold it all in memory, so only other bodies are part of the fingerprint
+    if not request.content_type.startswith('multipart/'):
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def begin(user_id, key, fingerprint):
+    """
+    Claim `key` for this request, taking over keys that expired or whose request died.
+    Returns: (record, True) if this request should run the view, (record, False) if the
+    record holds a response to replay, (BUSY, False) while another request has the key, or
+    (None, False) if no record can be created, e.g. because the token's user was deleted.
+    """
+    missing = 0
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user_id=user_id, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+        if record is None:
+            # Usually the earlier attempt failed and gave the key up, so claim it. A create that
+            # keeps failing with no row to conflict with is a foreign key violation instead
+            missing += 1
+            if missing >= CLAIM_ATTEMPTS:
+                return None, False
+            continue
+
+        expired = record.created_at < now - key_ttl()
+        abandoned = record.status == IdempotencyKey.IN_PROGRESS and (
+            record.locked_at < now - timedelta(seconds=lock_timeout())
+        )
+        if not expired and not abandoned:
+            return (record, False) if record.status == IdempotencyKey.DONE else (BUSY, False)
+
+        # Take the key over; the conditional update lets only one request win
+        taken = IdempotencyKey.objects.filter(
+            id=record.id, status=record.status, locked_at=record.locked_at
+        ).update(
+            fingerprint=fingerprint, status=IdempotencyKey.IN_PROGRESS, locked_at=now,
+            created_at=now if expired else record.created_at,
+            response_status=None, response_headers={}, response_body=b'',
+        )
+        if taken:
+            record.refresh_from_db()
+            return record, True
+
+
+def finish(record, response):
+    """
+    Store the view's response for replay, or give the key up if the response shouldn't be replayed.
+    """
+    if response.streaming or response.status_code >= 500:
+        IdempotencyKey.objects.filter(id=record.id).delete()
+        return
+    IdempotencyKey.objects.filter(id=record.id).update(
+        status=IdempotencyKey.DONE,
+        response_status=response.status_code,
+        response_headers=dict(response.items()),
+        response_body=response.content,
+    )
+
+
+def abandon(record):
+    IdempotencyKey.objects.filter(id=record.id).delete()
+
+
+def replay(record):
+    response = HttpResponse(bytes(record.response_body), status=record.response_status)
+    for name, value in record.response_headers.items():
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def mismatch():
+    return JsonResponse(
+        {'error': f'{HEADER} was already used for a different request'}, status=422
+    )
+
+
+def busy():
+    response = JsonResponse(
+        {'error': f'A request with this {HEADER} is still in progress'}, status=409
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+class IdempotencyMiddleware:
+    """
+    Runs each keyed request's view at most once, and replays its response to retries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    path_prefixes = ('/api/', '/account/')
+    # These set or clear the session cookies, which aren't stored for replay, and are safe to repeat
+    exempt_paths = ('/account/token', '/account/token/refresh', '/account/logout')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def prepare(self, request):
+        """
+        Returns (user id, key, fingerprint), an error response, or None if the request isn't keyed.
+        """
+        key = request.headers.get(HEADER)
+        if not key or request.method not in METHODS or not request.path_info.startswith(self.path_prefixes):
+            return None
+        if request.path_info in self.exempt_paths:
+            return None
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({'error': f'{HEADER} is too long (max {MAX_KEY_LENGTH})'}, status=400)
+        user_id = request_user_id(request)
+        if user_id is None:
+            return None  # The view rejects unauthenticated requests itself
+        return user_id, key, fingerprint(request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        prepared = self.prepare(request)
+        if prepared is None:
+            return self.get_response(request)
+        if isinstance(prepared, HttpResponse):
+            return prepared
+        user_id, key, digest = prepared
+
+        deadline = time.monotonic() + lock_timeout()
+        while True:
+            record, claimed = begin(user_id, key, digest)
+            if record is not BUSY:
+                break
+            if time.monotonic() >= deadline:
+                return busy()
+            time.sleep(POLL_INTERVAL)
+        if record is None:
+            return self.get_response(request)
+        if not claimed:
+            return replay(record) if record.fingerprint == digest else mismatch()
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            abandon(record)
+            raise
+        finish(record, response)
+        return response
+
+    async def __acall__(self, request):
+        prepared = self.prepare(request)
+        if prepared is None:
+            return await self.get_response(request)
+        if isinstance(prepared, HttpResponse):
+            return prepared
+        user_id, key, digest = prepared
+
+        deadline = time.monotonic() + lock_timeout()
+        while True:
+            record, claimed = await sync_to_async(begin)(user_id, key, digest)
+            if record is not BUSY:
+                break
+            if time.monotonic() >= deadline:
+                return busy()
+            await asyncio.sleep(POLL_INTERVAL)
+        if record is None:
+            return await self.get_response(request)
+        if not claimed:
+            return replay(record) if record.fingerprint == digest else mismatch()
+
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await sync_to_async(abandon)(record)
+            raise
+        await sync_to_async(finish)(record, response)
+        return response
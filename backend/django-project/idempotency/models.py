@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    """
+    The first response to a request sent with an Idempotency-Key header,
+    replayed to retries that reuse the key (see idempotency.middleware).
+    """
+    IN_PROGRESS = 'in_progress'
+    DONE = 'done'
+    STATUS_CHOICES = [
+        (IN_PROGRESS, 'In progress'),
+        (DONE, 'Done'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # Method, path and body the key was first used with
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=IN_PROGRESS)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict, blank=True)
+    response_body = models.BinaryField(default=b'', blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    locked_at = models.DateTimeField(default=timezone.now)  # When the running attempt started
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key'),
+        ]
+        db_table = 'idempotency_keys'
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
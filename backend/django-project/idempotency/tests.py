@@ -0,0 +1,73 @@
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from friendships.models import Friendship
+from .models import IdempotencyKey
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        User.objects.create_user('bob', password='password123')
+        User.objects.create_user('carol', password='password123')
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def befriend(self, username, key):
+        return self.client.post('/api/friends/request/', {'username': username}, format='json', headers={'Idempotency-Key': key})
+
+    def test_retry_replays_first_response(self):
+        first = self.befriend('bob', 'k1')
+        retry = self.befriend('bob', 'k1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Friendship.objects.count(), 1)
+
+        # A new key runs the view again, which now refuses the duplicate
+        self.assertEqual(self.befriend('bob', 'k2').status_code, 400)
+        self.assertEqual(self.befriend('carol', 'k1').status_code, 422)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=0.2)
+    def test_retry_waits_for_running_request_and_takes_over_once_it_dies(self):
+        self.befriend('bob', 'k1')
+        # As if the first request were still running
+        IdempotencyKey.objects.update(status=IdempotencyKey.IN_PROGRESS, locked_at=timezone.now())
+        Friendship.objects.all().delete()
+
+        started = time.monotonic()
+        self.assertEqual(self.befriend('bob', 'k1').status_code, 201)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(IdempotencyKey.objects.get().status, IdempotencyKey.DONE)
+
+    def test_account_endpoints_are_keyed(self):
+        body = {'password': 'password123'}
+        first = self.client.delete('/account/delete', body, format='json', headers={'Idempotency-Key': 'k1'})
+        # As if the first response, which clears the cookies, had been lost
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        retry = self.client.delete('/account/delete', body, format='json', headers={'Idempotency-Key': 'k1'})
+        self.assertEqual(first.status_code, 202)
+        # Not a 401 from the now deactivated account
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (202, 'true'))
+
+        self.client.post('/account/logout', headers={'Idempotency-Key': 'k2'})
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['k1'])
+
+
+class DeletedUserTests(TransactionTestCase):
+    # Foreign keys are only checked on commit, which TestCase never reaches
+    def test_token_of_deleted_user_is_rejected_not_retried(self):
+        user = User.objects.create_user('alice', password='password123')
+        User.objects.create_user('bob', password='password123')
+        client = APIClient()
+        client.cookies['access_token'] = str(AccessToken.for_user(user))
+        user.delete()
+
+        response = client.post('/api/friends/request/', {'username': 'bob'}, format='json', headers={'Idempotency-Key': 'k1'})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,82 @@
+"""
+Streaming JSONL dump of an instance, written by export_instance and read
+by import_instance.
+
+The first line is a header; every following line is one row:
+    {"model": "posts.post", "fields": {"id": 1, "user_id": 2, ...}}
+Fields are the raw column values (foreign keys as `<name>_id`), binary
+values are base64. Rows come in MODELS order, so every foreign key points
+at a row that was already loaded.
+"""
+import base64
+import datetime
+import gzip
+import io
+import json
+import sys
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from friendships.models import Friendship
+from posts.models import Comment, Post
+from profiles.models import Profile
+
+FORMAT = 'cyberspace-instance'
+VERSION = 1
+
+MODELS = [User, Profile, Friendship, Post, Comment]
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def binary_columns(model):
+    return [field.attname for field in model._meta.concrete_fields if isinstance(field, models.BinaryField)]
+
+
+def encode_row(row, binary):
+    for name in binary:
+        if row[name] is not None:
+            row[name] = base64.b64encode(bytes(row[name])).decode()
+    return row
+
+
+def decode_row(row, binary):
+    for name in binary:
+        if row.get(name) is not None:
+            row[name] = base64.b64decode(row[name])
+    return row
+
+
+class DumpEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder rounds to milliseconds; keep the full value
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def header():
+    return {'format': FORMAT, 'version': VERSION, 'models': [label(model) for model in MODELS]}
+
+
+def dumps(record):
+    return json.dumps(record, cls=DumpEncoder, separators=(',', ':')) + '\n'
+
+
+def open_dump(path, mode):
+    """
+    Open a dump for text reading ('r') or writing ('w'); gzip for *.gz, stdin/stdout for '-'.
+    """
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer if mode == 'r' else sys.stdout.buffer, encoding='utf-8')
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    return open(path, mode, encoding='utf-8')
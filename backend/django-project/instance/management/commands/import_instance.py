@@ -0,0 +1,144 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from backend.bulk import timestamps_from_values
+from instance.dump import FORMAT, MODELS, VERSION, binary_columns, columns, decode_row, label, open_dump
+
+
+class BulkCreateLoader:
+    """
+    Inserts rows with bulk_create, `batch_size` at a time.
+    """
+    def __init__(self, model, batch_size):
+        self.model = model
+        self.batch_size = batch_size
+        self.batch = []
+        self.count = 0
+
+    def add(self, row):
+        self.batch.append(self.model(**row))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # Keep the dump's created_at/updated_at instead of "now"
+        with timestamps_from_values(self.model):
+            self.model.objects.bulk_create(self.batch)
+        self.count += len(self.batch)
+        self.batch = []
+
+    def close(self):
+        if self.batch:
+            self.flush()
+        return self.count
+
+    def abort(self):
+        pass
+
+
+class CopyLoader:
+    """
+    Streams rows into one PostgreSQL COPY ... FROM STDIN per model.
+    """
+    def __init__(self, model, batch_size):
+        self.model = model
+        self.columns = columns(model)
+        self.count = 0
+        quote = connection.ops.quote_name
+        self.cursor = connection.cursor()
+        self.copy = self.cursor.copy(
+            f"COPY {quote(model._meta.db_table)} ({', '.join(quote(name) for name in self.columns)}) FROM STDIN"
+        )
+        self.writer = self.copy.__enter__()
+
+    def add(self, row):
+        self.writer.write_row([row.get(name) for name in self.columns])
+        self.count += 1
+
+    def close(self):
+        self.copy.__exit__(None, None, None)
+        self.cursor.close()
+        return self.count
+
+    def abort(self):
+        # Ends the COPY with an error, so the transaction can roll back
+        error = RuntimeError('Import aborted')
+        try:
+            self.copy.__exit__(type(error), error, None)
+        except Exception:
+            pass
+        self.cursor.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a dump written by export_instance into an empty, migrated database, keeping '
+        'ids. Uses COPY on PostgreSQL and batched bulk_create elsewhere, all in one '
+        'transaction, then resets the id sequences.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Dump file from export_instance ('-' for stdin)")
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create (not used with COPY)')
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            if model.objects.exists():
+                raise CommandError(
+                    f"{label(model)} already has rows; import into a freshly migrated database"
+                )
+
+        use_copy = False
+        if connection.vendor == 'postgresql':
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            use_copy = is_psycopg3  # psycopg2 has no row-by-row COPY writer
+        loader_class = CopyLoader if use_copy else BulkCreateLoader
+        models_by_label = {label(model): model for model in MODELS}
+        binary = {model: binary_columns(model) for model in MODELS}
+        counts = {}
+        start = time.perf_counter()
+
+        with open_dump(options['input'], 'r') as dump, transaction.atomic():
+            first = json.loads(dump.readline() or '{}')
+            if first.get('format') != FORMAT or first.get('version') != VERSION:
+                raise CommandError(f"Not a version {VERSION} {FORMAT} dump")
+
+            loader = None
+            try:
+                for line in dump:
+                    record = json.loads(line)
+                    model = models_by_label.get(record['model'])
+                    if model is None:
+                        raise CommandError(f"Unknown model {record['model']}")
+                    if loader is None or loader.model is not model:
+                        if loader is not None:
+                            counts[label(loader.model)] = loader.close()
+                        loader = None
+                        loader = loader_class(model, options['batch_size'])
+                    loader.add(decode_row(record['fields'], binary[model]))
+                if loader is not None:
+                    counts[label(loader.model)] = loader.close()
+                    loader = None
+            except (KeyError, ValueError) as e:
+                raise CommandError(f"Malformed dump: {e}")
+            finally:
+                if loader is not None:
+                    loader.abort()
+
+            # Rows were inserted with their ids, so the sequences still start at 1
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+                    cursor.execute(sql)
+
+        elapsed = time.perf_counter() - start
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count} rows")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {total} rows into {connection.vendor} with {'COPY' if use_copy else 'bulk_create'} "
+            f"in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)"
+        ))
@@ -0,0 +1,42 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from friendships.models import Friendship
+from posts.models import Comment, Post
+from profiles.models import Profile
+
+
+class InstanceDumpTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'instance.jsonl.gz')
+
+    def test_round_trip_keeps_ids_and_timestamps(self):
+        alice = User.objects.create_user('alice', password='password123')
+        bob = User.objects.create_user('bob', password='password123')
+        Profile.objects.filter(user=alice).update(bio='hi', profile_picture=b'\x89PNG\x00')
+        Friendship.objects.create(user1=alice, user2=bob, status='accepted', requester=alice)
+        post = Post.objects.create(user=bob, image_path='bob.jpg', caption='hello')
+        Comment.objects.create(post=post, user=alice, comment_text='nice')
+        before = {
+            model: list(model.objects.order_by('pk').values())
+            for model in (User, Profile, Friendship, Post, Comment)
+        }
+
+        call_command('export_instance', self.path, stdout=io.StringIO())
+        User.objects.all().delete()
+        call_command('import_instance', self.path, stdout=io.StringIO())
+
+        for model, rows in before.items():
+            self.assertEqual(list(model.objects.order_by('pk').values()), rows)
+        self.assertEqual(bytes(Profile.objects.get(user=alice).profile_picture), b'\x89PNG\x00')
+
+        with self.assertRaises(CommandError):
+            call_command('import_instance', self.path, stdout=io.StringIO())
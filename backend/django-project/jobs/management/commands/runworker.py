@@ -0,0 +1,74 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import claim, prune_finished, requeue_stale, run, worker_id
+
+logger = logging.getLogger('jobs.worker')
+
+# Polls between stale-job and retention sweeps
+MAINTENANCE_EVERY = 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs. Start as many workers as needed; '
+        'each claims one job at a time. Stops after the current job on SIGTERM or Ctrl+C.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+        parser.add_argument(
+            '--poll-interval', type=float,
+            help='Seconds to sleep when the queue is empty (default: settings.JOBS_POLL_INTERVAL)',
+        )
+        parser.add_argument('--max-jobs', type=int, help='Exit after this many jobs, e.g. to bound memory growth')
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval'] or getattr(settings, 'JOBS_POLL_INTERVAL', 1.0)
+        worker = worker_id()
+        self.stopping = False
+
+        def stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Worker {worker} started")
+        processed = failed = polls = 0
+        while not self.stopping:
+            if polls % MAINTENANCE_EVERY == 0:
+                requeued, failed_stale = requeue_stale()
+                if requeued or failed_stale:
+                    logger.warning(f"Stale jobs: {requeued} requeued, {failed_stale} failed")
+                prune_finished()
+            polls += 1
+
+            # Like a request: drop connections that broke or outlived CONN_MAX_AGE
+            close_old_connections()
+            try:
+                job = claim(worker)
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            start = time.perf_counter()
+            ok = run(job)
+            processed += 1
+            failed += not ok
+            logger.info(f"{job.name} #{job.id} {'done' if ok else 'failed'} in {time.perf_counter() - start:.2f}s")
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        close_old_connections()
+        self.stdout.write(f"Worker {worker} stopped after {processed} job(s), {failed} failed")
@@ -0,0 +1,64 @@
+"""
+Registered background jobs.
+
+Decorate a function in an app's tasks.py with @task, then queue it with
+enqueue(func, **kwargs). Arguments must be JSON serializable; pass ids
+rather than model instances, since the row may have changed by the time
+the job runs.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        enqueue(self, **kwargs)
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=5):
+    """
+    Register a function as a job. Use as @task or @task(priority=10, max_attempts=3).
+    """
+    def register(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', priority, max_attempts)
+        _tasks[registered.name] = registered
+        return registered
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def enqueue(task, *, priority=None, delay=None, using=None, **kwargs):
+    """
+    Queue `task` (a Task or its registered name) to run with `kwargs` once
+    the current transaction commits, so the worker never sees a job for
+    rows that were rolled back or aren't visible yet.
+    """
+    from .models import Job
+
+    if isinstance(task, str):
+        task = _tasks[task]
+    job = Job(
+        name=task.name,
+        kwargs=kwargs,
+        priority=task.priority if priority is None else priority,
+        max_attempts=task.max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+    transaction.on_commit(job.save, using=using)
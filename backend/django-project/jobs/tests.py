@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, task
+from .worker import requeue_stale, run_pending
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.slow')
+def slow(job_id):
+    started = Job.objects.get(id=job_id).locked_at
+    time.sleep(0.5)
+    calls.append(Job.objects.get(id=job_id).locked_at > started)
+
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_on_commit_and_run_by_priority(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record, value='low')
+            enqueue('tests.record', value='high', priority=10)
+            self.assertFalse(Job.objects.exists())
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.DONE})
+
+    def test_retries_with_backoff_then_fails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            flaky.enqueue()
+
+        run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertEqual(run_pending(), 0)  # Backing off
+
+        Job.objects.update(run_at=job.created_at)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_jobs_requeued_until_out_of_attempts(self):
+        stale = timezone.now() - timedelta(hours=1)
+        running = {'status': Job.RUNNING, 'locked_by': 'gone:1', 'locked_at': stale}
+        retry = Job.objects.create(name='tests.record', attempts=1, max_attempts=5, **running)
+        spent = Job.objects.create(name='tests.record', attempts=5, max_attempts=5, **running)
+        Job.objects.create(name='tests.record', attempts=1, **{**running, 'locked_at': timezone.now()})
+
+        self.assertEqual(requeue_stale(), (1, 1))
+        retry.refresh_from_db()
+        spent.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Job.QUEUED, ''))
+        self.assertEqual(spent.status, Job.FAILED)
+
+
+class HeartbeatTests(TransactionTestCase):
+    # The heartbeat writes from its own thread and connection
+    @override_settings(JOBS_HEARTBEAT_INTERVAL=0.1)
+    def test_running_job_keeps_its_lock_fresh(self):
+        calls.clear()
+        job = Job.objects.create(name='tests.slow')
+        Job.objects.filter(id=job.id).update(kwargs={'job_id': job.id})
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [True])
@@ -0,0 +1,176 @@
+"""
+Claiming and running queued jobs.
+
+On PostgreSQL each worker claims the next due job with SELECT ... FOR
+UPDATE SKIP LOCKED, so any number of workers can poll without blocking
+each other or running a job twice. SQLite has no row locks but only ever
+runs one write at a time, so there a conditional UPDATE does the claiming
+and a worker that loses the race moves on to the next candidate.
+
+While a job runs, a heartbeat thread refreshes its locked_at, so a job
+is only taken back from its worker once the heartbeat stops: the worker
+died. A job that keeps killing its worker fails after max_attempts like
+one that raises.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# Rows the SQLite fallback tries before giving up for this poll
+SQLITE_CLAIM_CANDIDATES = 10
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with jitter: about JOBS_RETRY_BASE_DELAY, then twice
+    that, four times... capped at JOBS_RETRY_MAX_DELAY seconds.
+    """
+    base = getattr(settings, 'JOBS_RETRY_BASE_DELAY', 5)
+    cap = getattr(settings, 'JOBS_RETRY_MAX_DELAY', 3600)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim(worker):
+    """
+    Mark the next due job as running by `worker` and return it, or None if nothing is due.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('-priority', 'run_at', 'id')
+    claimed = {
+        'status': Job.RUNNING, 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_id = due.select_for_update(skip_locked=True).values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            Job.objects.filter(id=job_id).update(**claimed)
+        return Job.objects.get(id=job_id)
+
+    for job_id in due.values_list('id', flat=True)[:SQLITE_CLAIM_CANDIDATES]:
+        if Job.objects.filter(id=job_id, status=Job.QUEUED).update(**claimed):
+            return Job.objects.get(id=job_id)
+    return None
+
+
+class Heartbeat:
+    """
+    Refreshes a running job's locked_at every JOBS_HEARTBEAT_INTERVAL seconds from a
+    background thread, for as long as the `with` block runs.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.beat, name=f'heartbeat-{job.id}', daemon=True)
+
+    def beat(self):
+        interval = getattr(settings, 'JOBS_HEARTBEAT_INTERVAL', 30)
+        try:
+            while not self.stopped.wait(interval):
+                try:
+                    Job.objects.filter(id=self.job.id, status=Job.RUNNING, locked_by=self.job.locked_by).update(
+                        locked_at=timezone.now()
+                    )
+                except Exception:
+                    logger.exception(f"Heartbeat for job {self.job} failed")
+        finally:
+            # The thread's own connection
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run(job):
+    """
+    Run a claimed job and record the outcome: done, queued again with backoff, or failed.
+    """
+    task = get_task(job.name)
+    try:
+        if task is None:
+            raise LookupError(f"No job registered as {job.name}")
+        with Heartbeat(job):
+            task(**job.kwargs)
+    except Exception as e:
+        error = traceback.format_exc()
+        update = {'locked_by': '', 'locked_at': None, 'last_error': error}
+        if task is None or job.attempts >= job.max_attempts:
+            logger.error(f"Job {job} failed after {job.attempts} attempt(s): {e}")
+            Job.objects.filter(id=job.id).update(status=Job.FAILED, finished_at=timezone.now(), **update)
+        else:
+            delay = retry_delay(job.attempts)
+            logger.warning(f"Job {job} failed (attempt {job.attempts}), retrying in {delay.total_seconds():.0f}s: {e}")
+            Job.objects.filter(id=job.id).update(status=Job.QUEUED, run_at=timezone.now() + delay, **update)
+        return False
+
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, finished_at=timezone.now(), locked_by='', locked_at=None, last_error='',
+    )
+    return True
+
+
+def requeue_stale():
+    """
+    Take back jobs whose worker died mid-run (no heartbeat for JOBS_LOCK_TIMEOUT seconds):
+    queue them again, or mark them failed once they've used up their attempts.
+    Returns the number of jobs requeued and failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT', 600))
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    released = {'locked_by': '', 'locked_at': None}
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=timezone.now(), last_error='Worker stopped during the last attempt',
+        **released,
+    )
+    requeued = stale.update(status=Job.QUEUED, **released)
+    return requeued, failed
+
+
+def prune_finished():
+    """
+    Delete done jobs older than JOBS_RETENTION_DAYS. Failed jobs are kept for inspection.
+    """
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'JOBS_RETENTION_DAYS', 7))
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_pending(worker=None, limit=None):
+    """
+    Run due jobs until none are left (or `limit` have run). Returns the number run.
+    """
+    worker = worker or worker_id()
+    count = 0
+    while limit is None or count < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run(job)
+        count += 1
+    return count
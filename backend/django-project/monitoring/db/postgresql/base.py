@@ -0,0 +1,22 @@
+"""
+PostgreSQL backend that reports how long getting a connection takes.
+
+Use ENGINE 'monitoring.db.postgresql'. With OPTIONS['pool'] this is the wait
+for a free pooled connection; without it, the TCP + auth handshake.
+"""
+import time
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+
+from monitoring.metrics import record_connection_acquired
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        pool = self.pool
+        record_connection_acquired(
+            self.alias, time.perf_counter() - start, pool.get_stats() if pool is not None else None
+        )
+        return connection
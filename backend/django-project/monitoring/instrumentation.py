@@ -0,0 +1,77 @@
+"""
+Per-request timing and SQL instrumentation.
+
+RequestMetrics collects query count, DB time, serializer time and view
+time for the request being handled. It lives in a context variable, so
+it follows the request into sync_to_async threads and async views.
+Serializer time is added by the serializers in monitoring.serializers.
+Database connections are per thread, so record_query is installed on
+every connection as it is opened rather than around each request.
+"""
+import contextvars
+import time
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = []  # (sql, duration in seconds)
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.started = time.perf_counter()
+        self.view_time = 0.0
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def add_query(self, sql, duration):
+        self.db_time += duration
+        self.queries.append((sql, duration))
+
+    def finish(self):
+        self.view_time = time.perf_counter() - self.started
+
+    def top_queries(self, count=5):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:count]
+
+
+def current_metrics():
+    """
+    Get the RequestMetrics of the request being handled, or None outside a request.
+    """
+    return _current_metrics.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that times each query of the current request.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver adding record_query to each new connection.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current_metrics.set(metrics)
+
+
+def end_request(token):
+    _current_metrics.reset(token)
@@ -0,0 +1,100 @@
+"""
+Prometheus metrics for the API.
+
+With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py), every worker
+writes its samples to that directory and /metrics/ merges them, so the
+numbers cover all workers rather than whichever one answered.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+REQUEST_COUNT = Counter(
+    'http_requests_total', 'HTTP requests by view, method and status code',
+    ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request',
+    ['view'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries run per request',
+    ['view'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+DB_TIME = Counter(
+    'http_request_db_seconds_total', 'Time spent in database queries',
+    ['view'],
+)
+UPLOAD_BYTES = Counter(
+    'http_upload_bytes_total', 'Bytes received in multipart upload requests',
+    ['view'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by result (hit or miss)',
+    ['result'],
+)
+
+DB_CONNECTION_ACQUIRE = Histogram(
+    'db_connection_acquire_seconds', 'Time to get a database connection (pool wait, or connect when not pooled)',
+    ['alias', 'pooled'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+# Summed over live worker processes
+DB_POOL_SIZE = Gauge(
+    'db_pool_connections', 'Connections held by the pools of all workers',
+    ['alias'], multiprocess_mode='livesum',
+)
+DB_POOL_AVAILABLE = Gauge(
+    'db_pool_available_connections', 'Idle connections in the pools of all workers',
+    ['alias'], multiprocess_mode='livesum',
+)
+
+
+def observe_request(request, response, metrics, view_name):
+    """
+    Record one finished request. `metrics` is the request's RequestMetrics.
+    """
+    view = view_name or 'unmatched'
+    REQUEST_COUNT.labels(view, request.method, str(response.status_code)).inc()
+    REQUEST_LATENCY.labels(view).observe(metrics.view_time)
+    DB_QUERIES.labels(view).observe(metrics.query_count)
+    DB_TIME.labels(view).inc(metrics.db_time)
+
+    if request.content_type == 'multipart/form-data':
+        try:
+            UPLOAD_BYTES.labels(view).inc(int(request.META.get('CONTENT_LENGTH') or 0))
+        except ValueError:
+            pass
+
+
+def record_cache_lookup(hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels('hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels('miss').inc(misses)
+
+
+def record_connection_acquired(alias, seconds, pool_stats=None):
+    """
+    Record one new database connection; `pool_stats` is psycopg_pool's get_stats() when pooled.
+    """
+    DB_CONNECTION_ACQUIRE.labels(alias, 'true' if pool_stats is not None else 'false').observe(seconds)
+    if pool_stats is not None:
+        DB_POOL_SIZE.labels(alias).set(pool_stats.get('pool_size', 0))
+        DB_POOL_AVAILABLE.labels(alias).set(pool_stats.get('pool_available', 0))
+
+
+def render_latest():
+    """
+    Render all metrics in the Prometheus text format. Returns (body, content type).
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,95 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import start_request, end_request
+from .metrics import observe_request
+
+logger = logging.getLogger('monitoring.requests')
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a view runs more queries than QUERY_BUDGETS allows
+    and ENFORCE_QUERY_BUDGETS is on.
+    """
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records query count, DB time, serializer time and view time for each
+    request. They are sent back in a Server-Timing header and written as
+    one JSON log line; slow requests also log their slowest queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+            return self.process(request, response, metrics)
+        finally:
+            end_request(token)
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+            return self.process(request, response, metrics)
+        finally:
+            end_request(token)
+
+    def process(self, request, response, metrics):
+        metrics.finish()
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.query_count} queries"',
+                f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+                f'view;dur={metrics.view_time * 1000:.1f}',
+            ])
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': metrics.query_count,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'serializer_ms': round(metrics.serializer_time * 1000, 1),
+            'view_ms': round(metrics.view_time * 1000, 1),
+        }
+        if metrics.view_time * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+            record['top_queries'] = [
+                {'sql': sql, 'ms': round(duration * 1000, 1)}
+                for sql, duration in metrics.top_queries()
+            ]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+        observe_request(request, response, metrics, view_name)
+        self.check_query_budget(view_name, metrics)
+        return response
+
+    def check_query_budget(self, view_name, metrics):
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is None or metrics.query_count <= budget:
+            return
+
+        message = f"{view_name} ran {metrics.query_count} queries (budget {budget})"
+        if getattr(settings, 'ENFORCE_QUERY_BUDGETS', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,163 @@
+"""
+On-demand cProfile capture of single requests.
+
+A request is profiled when a staff user sends the PROFILER_HEADER header or
+the PROFILER_QUERY_PARAM query flag, or at random for a PROFILER_SAMPLE_RATE
+fraction of all requests. Profiles are written as .pstats files to
+PROFILER_DIR and listed on the admin page at /admin/profiles/.
+"""
+import cProfile
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.authentication import CookiesJWTAuthentication
+
+# One profile at a time per process: a second profiler on the same thread
+# would replace the first one's hook
+_lock = threading.Lock()
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'request_profiles'))
+
+
+def list_profiles():
+    """
+    Saved profiles, newest first, as (filename, size, modified) tuples.
+    """
+    try:
+        entries = [entry for entry in os.scandir(profile_dir()) if entry.name.endswith('.pstats')]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [(entry.name, entry.stat().st_size, entry.stat().st_mtime) for entry in entries]
+
+
+def profile_path(filename):
+    """
+    Absolute path of a saved profile, or None if `filename` isn't one.
+    """
+    if os.path.basename(filename) != filename or not filename.endswith('.pstats'):
+        return None
+    path = os.path.join(profile_dir(), filename)
+    return path if os.path.isfile(path) else None
+
+
+def save_profile(profilers, request, duration):
+    """
+    Write the merged stats of `profilers` and prune the oldest files beyond PROFILER_MAX_FILES.
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    view = request.resolver_match.view_name if request.resolver_match else request.path
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', view).strip('-')[:60] or 'request'
+    filename = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method}-{slug}-{duration * 1000:.0f}ms.pstats"
+
+    stats = None
+    for profiler in profilers:
+        profiler.create_stats()
+        if stats is None:
+            stats = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+    stats.dump_stats(os.path.join(directory, filename))
+
+    for name, _, _ in list_profiles()[getattr(settings, 'PROFILER_MAX_FILES', 200):]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    return filename
+
+
+class ProfilerMiddleware:
+    """
+    Profiles selected requests with cProfile. Must come after AuthenticationMiddleware.
+
+    Under ASGI a profiled request is run through a worker thread so sync views
+    and the ORM calls of async views land on a profiled thread; the event loop
+    thread is profiled too, so other requests served concurrently may show up.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = getattr(settings, 'PROFILER_SAMPLE_RATE', 0.0)
+        return bool(rate) and random.random() < rate
+
+    def flagged(self, request):
+        header = getattr(settings, 'PROFILER_HEADER', 'X-Profile')
+        param = getattr(settings, 'PROFILER_QUERY_PARAM', 'profile')
+        return bool(request.headers.get(header) or request.GET.get(param))
+
+    def is_staff(self, request):
+        if request.user.is_authenticated:  # Session login, e.g. from the admin
+            return request.user.is_staff
+        auth = CookiesJWTAuthentication().authenticate(request)
+        return auth is not None and auth[0].is_staff
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        staff = self.flagged(request) and self.is_staff(request)
+        if not (staff or self.sampled()) or not _lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            return self.finish(request, response, [profiler], time.perf_counter() - start, staff)
+        finally:
+            _lock.release()
+
+    async def __acall__(self, request):
+        # Only flagged requests pay for the staff check's thread hop
+        staff = self.flagged(request) and await sync_to_async(self.is_staff)(request)
+        if not (staff or self.sampled()) or not _lock.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            loop_profiler = cProfile.Profile()
+            thread_profiler = cProfile.Profile()
+
+            def run_profiled():
+                thread_profiler.enable()
+                try:
+                    return async_to_sync(self.get_response)(request)
+                finally:
+                    thread_profiler.disable()
+
+            start = time.perf_counter()
+            loop_profiler.enable()
+            try:
+                response = await sync_to_async(run_profiled)()
+            finally:
+                loop_profiler.disable()
+            return self.finish(request, response, [thread_profiler, loop_profiler], time.perf_counter() - start, staff)
+        finally:
+            _lock.release()
+
+    def finish(self, request, response, profilers, duration, staff):
+        profile_id = save_profile(profilers, request, duration)
+        # Profiles are admin-only, so only staff who asked for one are told its id
+        if staff:
+            response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,34 @@
+"""
+Opt-in serializer timing.
+
+Serializers that mix in TimedSerializerMixin add the time spent building
+their .data, including queries run by SerializerMethodFields, to the
+request's serializer time. Set `list_serializer_class = TimedListSerializer`
+in their Meta so many=True is timed too. DRF itself is left unpatched.
+"""
+import time
+
+from rest_framework import serializers
+
+from .instrumentation import current_metrics
+
+
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        metrics = current_metrics()
+        # Nested serializers are part of the outermost one's time
+        if metrics is None or metrics.serializer_depth:
+            return super().data
+
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
@@ -0,0 +1,104 @@
+import os
+import re
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from friendships.models import Friendship
+from posts.models import Post
+from posts.serializers import PostSerializer
+from .middleware import QueryBudgetExceeded
+
+
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        friend = User.objects.create_user('bob', password='password123')
+        Friendship.objects.create(user1=self.user, user2=friend, status='accepted', requester=self.user)
+        Post.objects.create(user=friend, image_path='bob.jpg', caption='hello')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/posts/feed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+, view;dur=[\d.]+$')
+
+    def test_serializer_time_covers_method_fields(self):
+        get_comments = PostSerializer.get_comments
+
+        def slow_get_comments(serializer, obj):
+            time.sleep(0.05)
+            return get_comments(serializer, obj)
+
+        with mock.patch.object(PostSerializer, 'get_comments', slow_get_comments):
+            response = self.client.get('/api/posts/feed/')
+        serializer_ms = float(re.search(r'serializer;dur=([\d.]+)', response['Server-Timing']).group(1))
+        view_ms = float(re.search(r'view;dur=([\d.]+)', response['Server-Timing']).group(1))
+        self.assertGreaterEqual(serializer_ms, 50)
+        self.assertLessEqual(serializer_ms, view_ms)
+
+    @override_settings(ENFORCE_QUERY_BUDGETS=True, QUERY_BUDGETS={'post_feed': 1})
+    def test_enforced_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/api/posts/feed/')
+
+    @override_settings(ENFORCE_QUERY_BUDGETS=False, QUERY_BUDGETS={'post_feed': 1})
+    def test_unenforced_budget_logs(self):
+        with self.assertLogs('monitoring.requests', level='WARNING'):
+            response = self.client.get('/api/posts/feed/')
+        self.assertEqual(response.status_code, 200)
+
+
+class MetricsEndpointTests(TestCase):
+    def test_metrics_include_request_counts(self):
+        user = User.objects.create_user('alice', password='password123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        client.get('/api/friends/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_requests_total{method="GET",status="200",view="get_friends"}', response.content)
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        self.settings_override = override_settings(PROFILER_DIR=self.profile_dir.name, PROFILER_SAMPLE_RATE=0.0)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def get_as(self, user, **extra):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(user))
+        return self.client.get('/api/friends/', **extra)
+
+    def test_staff_flag_writes_profile(self):
+        staff = User.objects.create_user('admin', password='password123', is_staff=True)
+        response = self.get_as(staff, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(self.profile_dir.name), [response['X-Profile-Id']])
+
+        self.client.force_login(staff)
+        listing = self.client.get('/admin/profiles/')
+        self.assertContains(listing, response['X-Profile-Id'])
+
+    def test_flag_ignored_for_non_staff(self):
+        user = User.objects.create_user('alice', password='password123')
+        response = self.get_as(user, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.profile_dir.name), [])
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0)
+    def test_sampled_profile_id_not_sent_to_non_staff(self):
+        user = User.objects.create_user('alice', password='password123')
+        response = self.get_as(user)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(len(os.listdir(self.profile_dir.name)), 1)
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .metrics import render_latest
+from .profiling import list_profiles, profile_dir, profile_path
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus text-format metrics for all workers.
+    Not proxied by nginx; scrape it from inside the deployment network.
+    """
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+@staff_member_required
+def profile_list(request):
+    """
+    Admin page listing the saved request profiles.
+    """
+    profiles = [
+        {
+            'name': name,
+            'size_kb': round(size / 1024, 1),
+            'modified': datetime.fromtimestamp(modified, tz=timezone.get_current_timezone()),
+        }
+        for name, size, modified in list_profiles()
+    ]
+    return render(request, 'monitoring/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': profiles,
+        'profile_dir': profile_dir(),
+    })
+
+
+@staff_member_required
+def profile_download(request, filename):
+    """
+    Download one .pstats file (open it with `python -m pstats` or snakeviz).
+    """
+    path = profile_path(filename)
+    if path is None:
+        raise Http404("Profile not found")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename)
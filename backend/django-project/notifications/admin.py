@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Event
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'created_at')
+    list_filter = ('event_type', 'created_at')
+    ordering = ('-created_at',)
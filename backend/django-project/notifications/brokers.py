@@ -0,0 +1,159 @@
+"""
+Fan-out layer for server-push notifications.
+
+The broker is chosen with settings.NOTIFICATIONS_BROKER:
+- InMemoryBroker: delivers within one process (development and tests)
+- DatabaseBroker: shares events between worker processes through the database
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events queued for a client that stops reading are dropped past this point
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+# DatabaseBroker events are only needed until every poller has seen them;
+# prune_notification_events deletes older ones
+EVENT_RETENTION = timedelta(minutes=10)
+
+
+class Subscription:
+    """
+    One connected client listening for events addressed to `user_id`.
+    """
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def deliver(self, event):
+        """
+        Queue an event for this client. Safe to call from any thread.
+        """
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping {event['type']} event for slow client of user {self.user_id}")
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next event. Returns None if `timeout` seconds pass first.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """
+    Delivers events to subscribers in the current process only.
+    """
+    def __init__(self):
+        self.subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscriptions.get(subscription.user_id)
+        if subscriptions:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.user_id]
+
+    def publish(self, event_type, recipients, payload):
+        """
+        Send an event to every connected client of the given user ids.
+        """
+        self.dispatch({'type': event_type, 'data': payload}, recipients)
+
+    def dispatch(self, event, recipients):
+        for user_id in recipients:
+            for subscription in list(self.subscriptions.get(user_id, ())):
+                subscription.deliver(event)
+
+
+class DatabaseBroker(InMemoryBroker):
+    """
+    Stores events in the database. Each process runs a single poller that
+    reads new events by id and hands them to its local subscribers, so
+    the database sees one cheap index seek per process per interval no
+    matter how many clients are connected.
+    """
+    def __init__(self, poll_interval=None):
+        super().__init__()
+        self.poll_interval = poll_interval or getattr(settings, 'NOTIFICATIONS_POLL_INTERVAL', 1.0)
+        self.poller = None
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        if self.poller is None or self.poller.done() or self.poller.get_loop() is not subscription.loop:
+            self.poller = subscription.loop.create_task(self.poll())
+        return subscription
+
+    def publish(self, event_type, recipients, payload):
+        from .models import Event
+
+        Event.objects.create(event_type=event_type, recipients=list(recipients), payload=payload)
+
+    async def poll(self):
+        last_id = await sync_to_async(self._latest_id)()
+        while self.subscriptions:
+            try:
+                events = await sync_to_async(self._fetch)(last_id)
+                for event in events:
+                    last_id = event.id
+                    self.dispatch({'type': event.event_type, 'data': event.payload}, event.recipients)
+            except Exception:
+                logger.exception("Notification poller failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _latest_id(self):
+        from .models import Event
+
+        return Event.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _fetch(self, last_id):
+        from .models import Event
+
+        return list(Event.objects.filter(id__gt=last_id).order_by('id'))
+
+
+def prune_events():
+    """
+    Delete stored events older than EVENT_RETENTION. Returns the number deleted.
+    """
+    from .models import Event
+
+    deleted, _ = Event.objects.filter(created_at__lt=timezone.now() - EVENT_RETENTION).delete()
+    return deleted
+
+
+_broker = None
+
+
+def get_broker():
+    """
+    Get the process-wide broker configured by settings.NOTIFICATIONS_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.NOTIFICATIONS_BROKER)()
+    return _broker
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from notifications.brokers import prune_events
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete notification events older than EVENT_RETENTION. Only needed with the '
+        'DatabaseBroker, which stores every event; run it from cron, e.g. every few minutes.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_events()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} old notification events"))
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class Event(models.Model):
+    """
+    Notification event stored for the DatabaseBroker, so every worker
+    process can pick it up and push it to its own connected clients.
+    """
+    event_type = models.CharField(max_length=50)
+    recipients = models.JSONField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'notification_events'
+
+    def __str__(self):
+        return f"{self.event_type} event at {self.created_at}"
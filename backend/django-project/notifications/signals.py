@@ -0,0 +1,57 @@
+"""
+Publish notification events when posts, comments and friend requests change.
+Events are sent once the surrounding transaction commits.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from friendships.models import Friendship
+from friendships.utils import get_friend_ids
+from posts.models import Post, Comment
+from .brokers import get_broker
+
+
+def publish_on_commit(event_type, recipients, payload):
+    transaction.on_commit(lambda: get_broker().publish(event_type, recipients, payload))
+
+
+@receiver(post_save, sender=Post)
+def notify_new_post(sender, instance, created, **kwargs):
+    if not created:
+        return
+    recipients = get_friend_ids(instance.user)
+    if recipients:
+        publish_on_commit('new_post', recipients, {
+            'post_id': instance.id,
+            'username': instance.user.username,
+        })
+
+
+@receiver(post_save, sender=Comment)
+def notify_new_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    post_owner_id = instance.post.user_id
+    if post_owner_id != instance.user_id:
+        publish_on_commit('new_comment', [post_owner_id], {
+            'comment_id': instance.id,
+            'post_id': instance.post_id,
+            'username': instance.user.username,
+        })
+
+
+@receiver(post_save, sender=Friendship)
+def notify_friend_request(sender, instance, created, update_fields=None, **kwargs):
+    if created and instance.status == 'pending':
+        recipient_id = instance.user2_id if instance.requester_id == instance.user1_id else instance.user1_id
+        publish_on_commit('friend_request', [recipient_id], {
+            'friendship_id': instance.id,
+            'username': instance.requester.username,
+        })
+    elif not created and instance.status == 'accepted' and (update_fields is None or 'status' in update_fields):
+        accepter = instance.user2 if instance.requester_id == instance.user1_id else instance.user1
+        publish_on_commit('friend_request_accepted', [instance.requester_id], {
+            'friendship_id': instance.id,
+            'username': accepter.username,
+        })
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from friendships.models import Friendship
+from posts.models import Comment, Post
+from .brokers import InMemoryBroker
+from .models import Event
+
+
+class InMemoryBrokerTests(TestCase):
+    async def test_publish_fans_out_to_each_recipients_clients(self):
+        broker = InMemoryBroker()
+        phone, laptop, other = broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+
+        broker.publish('new_post', [1, 3], {'post_id': 7})
+        expected = {'type': 'new_post', 'data': {'post_id': 7}}
+        self.assertEqual(await phone.get(timeout=1), expected)
+        self.assertEqual(await laptop.get(timeout=1), expected)
+        self.assertIsNone(await other.get(timeout=0.05))
+
+        phone.close()
+        laptop.close()
+        self.assertEqual(list(broker.subscriptions), [2])
+
+
+class PublishOnCommitTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='password123')
+        self.bob = User.objects.create_user('bob', password='password123')
+        patcher = mock.patch('notifications.signals.get_broker')
+        self.publish = patcher.start().return_value.publish
+        self.addCleanup(patcher.stop)
+
+    def published(self, create):
+        """
+        Run `create` and return the events it published, checking none went out before commit.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            create()
+            self.publish.assert_not_called()
+        events = [call.args for call in self.publish.call_args_list]
+        self.publish.reset_mock()
+        return events
+
+    def test_events_for_each_signal(self):
+        friendship = Friendship(user1=self.alice, user2=self.bob, requester=self.alice, status='pending')
+        events = self.published(friendship.save)
+        self.assertEqual(events, [('friend_request', [self.bob.id], {'friendship_id': friendship.id, 'username': 'alice'})])
+
+        friendship.status = 'accepted'
+        events = self.published(friendship.save)
+        self.assertEqual(events, [('friend_request_accepted', [self.alice.id], {'friendship_id': friendship.id, 'username': 'bob'})])
+
+        post = Post(user=self.bob, image_path='bob.jpg', caption='hi')
+        events = self.published(post.save)
+        self.assertEqual(events, [('new_post', [self.alice.id], {'post_id': post.id, 'username': 'bob'})])
+
+        comment = Comment(post=post, user=self.alice, comment_text='nice')
+        events = self.published(comment.save)
+        self.assertEqual(events, [('new_comment', [self.bob.id], {'comment_id': comment.id, 'post_id': post.id, 'username': 'alice'})])
+
+        # Nobody is told about their own comment
+        self.assertEqual(self.published(lambda: Comment.objects.create(post=post, user=self.bob, comment_text='thanks')), [])
+
+
+class EventStreamTests(TestCase):
+    async def test_requires_authentication(self):
+        response = await self.async_client.get('/api/events/stream/')
+        self.assertEqual(response.status_code, 401)
+
+
+class PruneEventsTests(TestCase):
+    def test_prune_command_deletes_old_events(self):
+        old = Event.objects.create(event_type='new_post', recipients=[1], payload={})
+        Event.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(hours=1))
+        recent = Event.objects.create(event_type='new_post', recipients=[1], payload={})
+
+        call_command('prune_notification_events', stdout=StringIO())
+        self.assertEqual(list(Event.objects.values_list('id', flat=True)), [recent.id])
@@ -0,0 +1,46 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from accounts.authentication import CookiesJWTAuthentication
+from .brokers import get_broker
+
+# Seconds between keep-alive comments, so proxies don't close idle streams
+KEEPALIVE_INTERVAL = 15
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-Sent Events stream of notifications for the current user
+    (new_post, new_comment, friend_request, friend_request_accepted).
+    Needs an ASGI server: every open stream is a long-lived connection.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Event stream requires an ASGI server'}, status=501)
+
+    user_auth = await sync_to_async(CookiesJWTAuthentication().authenticate)(request)
+    if user_auth is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    user = user_auth[0]
+
+    async def stream():
+        subscription = get_broker().subscribe(user.id)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = await subscription.get(timeout=KEEPALIVE_INTERVAL)
+                if event is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,18 +1,33 @@
 from django.contrib import admin
+from django.db.models import Q
+from search.index import text_search
 from .models import Post, Comment
 
 
+class TextSearchAdmin(admin.ModelAdmin):
+    """
+    Searches by username prefix or full-text match on the indexed text column,
+    instead of icontains scans over the whole table.
+    """
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = text_search(self.model.objects.all(), search_term).values('id')
+        return queryset.filter(Q(user__username__istartswith=search_term) | Q(id__in=matches)), False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(TextSearchAdmin):
     list_display = ('id', 'user', 'caption', 'created_at')
-    search_fields = ('user__username', 'caption')
+    search_fields = ('user__username', 'caption')  # See TextSearchAdmin
     list_filter = ('created_at',)
     ordering = ('-created_at',)
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(TextSearchAdmin):
     list_display = ('id', 'user', 'post', 'comment_text', 'created_at')
-    search_fields = ('user__username', 'comment_text')
+    search_fields = ('user__username', 'comment_text')  # See TextSearchAdmin
     list_filter = ('created_at',)
     ordering = ('-created_at',)
@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete files in MEDIA_ROOT that no post refers to, e.g. left behind by crashes or '
+        'deletions that predate the background cleanup. Streams the directory and checks '
+        'names against the posts.image_path index in batches, so memory use stays flat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List orphaned files without deleting them')
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Only consider files older than this many hours, so uploads in progress are never touched',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = time.time() - options['min_age'] * 3600
+        scanned = orphaned = freed = 0
+
+        def collect(batch):
+            nonlocal orphaned, freed
+            used = set(Post.objects.filter(image_path__in=list(batch)).values_list('image_path', flat=True))
+            for name, entry in batch.items():
+                if name in used:
+                    continue
+                orphaned += 1
+                freed += entry.stat().st_size
+                if options['dry_run']:
+                    self.stdout.write(entry.path)
+                    continue
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+        batch = {}
+        try:
+            entries = os.scandir(settings.MEDIA_ROOT)
+        except FileNotFoundError:
+            self.stdout.write(f"{settings.MEDIA_ROOT} does not exist")
+            return
+        with entries:
+            for entry in entries:
+                # Post images live at the top level; subdirectories belong to other features
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                scanned += 1
+                if entry.stat().st_mtime > cutoff:
+                    continue
+                batch[entry.name] = entry
+                if len(batch) >= options['batch_size']:
+                    collect(batch)
+                    batch = {}
+        if batch:
+            collect(batch)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files; {verb} {orphaned} orphaned "
+            f"({freed / 1024 / 1024:.1f} MB)"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image_path',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from django.db import models
+from django.db.models import Subquery
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from backend.dirty import DirtyFieldsMixin
 
 
-class Post(models.Model):
+class Post(DirtyFieldsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
-    image_path = models.CharField(max_length=500)
+    image_path = models.CharField(max_length=500, db_index=True)  # Looked up by gc_media
     caption = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -14,6 +18,7 @@ class Post(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'updated_at']),
         ]
         db_table = 'posts'
 
@@ -23,12 +28,12 @@ class Post(models.Model):
     def clean(self):
         # Validate max 1000 posts per user
         if not self.pk:  # Only check on creation
-            user_post_count = Post.objects.filter(user=self.user).count()
+            user_post_count = Post.objects.filter(user_id=self.user_id).count()
             if user_post_count >= 1000:
                 raise ValidationError("Maximum 1000 posts per user reached")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        self.clean_changed()
         super().save(*args, **kwargs)
 
 
@@ -42,8 +47,65 @@ class Comment(models.Model):
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['post', 'user']),
+            models.Index(fields=['post', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
         ]
         db_table = 'comments'
 
     def __str__(self):
         return f"Comment by {self.user.username} on post {self.post.id}"
+
+
+class Tombstone(models.Model):
+    """
+    Marker left behind when a post or comment is deleted, so delta sync
+    can tell clients what to remove. Plain ids are stored instead of
+    foreign keys because the referenced rows no longer exist.
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('comment', 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    post_id = models.BigIntegerField()
+    post_owner_id = models.BigIntegerField()
+    author_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post_owner_id', 'deleted_at']),
+            models.Index(fields=['author_id', 'deleted_at']),
+        ]
+        db_table = 'tombstones'
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
+
+
+@receiver(post_delete, sender=Post)
+def record_post_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind='post',
+        object_id=instance.id,
+        post_id=instance.id,
+        post_owner_id=instance.user_id,
+        author_id=instance.user_id,
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def record_comment_tombstone(sender, instance, origin=None, **kwargs):
+    # Comments removed along with their post are covered by the post's tombstone
+    if isinstance(origin, Post) or getattr(origin, 'model', None) is Post:
+        return
+    Tombstone.objects.create(
+        kind='comment',
+        object_id=instance.id,
+        post_id=instance.post_id,
+        # A subquery, not instance.post, so deleting many comments doesn't load each one's post
+        post_owner_id=Subquery(Post.objects.filter(id=instance.post_id).values('user_id')),
+        author_id=instance.user_id,
+    )
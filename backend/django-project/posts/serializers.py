@@ -1,19 +1,21 @@
 from rest_framework import serializers
 from .models import Post, Comment
+from monitoring.serializers import TimedListSerializer, TimedSerializerMixin
 from profiles.serializers import ProfileSerializer
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     display_name = serializers.CharField(source='user.profile.display_name', read_only=True)
     
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'display_name', 'comment_text', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     display_name = serializers.CharField(source='user.profile.display_name', read_only=True)
     profile_picture_base64 = serializers.SerializerMethodField()
@@ -21,6 +23,7 @@ class PostSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Post
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'display_name', 'profile_picture_base64', 'image_path', 'caption', 'created_at', 'updated_at', 'comments']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -35,11 +38,15 @@ class PostSerializer(serializers.ModelSerializer):
         if not request:
             return []
         
+        # Use comments already loaded by visible_comments_prefetch()
+        if hasattr(obj, 'visible_comments'):
+            return CommentSerializer(obj.visible_comments, many=True).data
+        
         # Filter comments based on visibility rules
         # User can see: their own comments + all comments if they own the post
         if obj.user == request.user:
-            # Post owner sees all comments
-            comments = obj.comments.all()
+            # Post owner sees all comments, except deleted accounts'
+            comments = obj.comments.filter(user__is_active=True)
         else:
             # Others only see their own comments
             comments = obj.comments.filter(user=request.user)
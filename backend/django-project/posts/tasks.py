@@ -0,0 +1,10 @@
+from jobs.registry import task
+from .utils import remove_media_files
+
+
+@task(priority=-10)
+def delete_media_file(path):
+    """
+    Remove an uploaded file (relative to MEDIA_ROOT) whose post is gone.
+    """
+    remove_media_files([path])
@@ -0,0 +1,259 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.cursor import encode_cursor
+from friendships.models import Friendship
+from .models import Comment, Post, Tombstone
+from .utils import make_watermark
+
+
+class FeedQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def add_friends(self, count):
+        start = User.objects.count()
+        friends = User.objects.bulk_create(
+            User(username=f'friend{start + i}') for i in range(count)
+        )
+        # Both directions, so the user1/user2 halves of the subquery are covered
+        Friendship.objects.bulk_create(
+            Friendship(user1=self.user, user2=friend, status='accepted', requester=self.user)
+            if i % 2 else
+            Friendship(user1=friend, user2=self.user, status='accepted', requester=friend)
+            for i, friend in enumerate(friends)
+        )
+        posts = Post.objects.bulk_create(
+            Post(user=friend, image_path=f'{friend.username}.jpg', caption='hello') for friend in friends
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, user=self.user, comment_text='nice') for post in posts
+        )
+
+    def feed_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/posts/feed/?limit=50')
+        self.assertEqual(response.status_code, 200)
+        return response, len(captured)
+
+    def test_query_count_independent_of_friend_count(self):
+        self.add_friends(2)
+        response, few = self.feed_queries()
+        self.assertEqual(len(response.data['posts']), 2)
+
+        self.add_friends(60)
+        response, many = self.feed_queries()
+        self.assertEqual(len(response.data['posts']), 50)
+        self.assertEqual(few, many)
+        self.assertEqual(many, 3)  # Count, posts, visible comments
+
+    def test_excludes_pending_and_strangers(self):
+        stranger = User.objects.create_user('mallory')
+        pending = User.objects.create_user('carol')
+        Friendship.objects.create(user1=self.user, user2=pending, status='pending', requester=self.user)
+        Post.objects.create(user=stranger, image_path='m.jpg', caption='hi')
+        Post.objects.create(user=pending, image_path='c.jpg', caption='hi')
+
+        response, _ = self.feed_queries()
+        self.assertEqual(response.data['posts'], [])
+
+
+class RankedFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        self.heavy = User.objects.create_user('heavy')
+        self.light = User.objects.create_user('light')
+        self.close = User.objects.create_user('close')
+        for friend in (self.heavy, self.light, self.close):
+            Friendship.objects.create(user1=self.user, user2=friend, status='accepted', requester=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, user, hours_ago):
+        post = Post.objects.create(user=user, image_path=f'{user.username}.jpg', caption='hi')
+        Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        return post.id
+
+    def ranked(self, **params):
+        response = self.client.get('/api/posts/feed/', {'mode': 'ranked', **params})
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['posts']], response.data['cursor']
+
+    def test_scores_recency_diversity_and_affinity(self):
+        heavy = [self.post(self.heavy, hours) for hours in (1, 2, 3, 4)]
+        light = self.post(self.light, 6)
+        close = self.post(self.close, 6)
+        mine = Post.objects.create(user=self.user, image_path='a.jpg', caption='hi')
+        Comment.objects.create(post=mine, user=self.close, comment_text='hello')
+
+        ids, cursor = self.ranked()
+        self.assertEqual(ids[:2], [close, heavy[0]])  # One comment exchanged outweighs 5 hours
+        self.assertLess(ids.index(light), ids.index(heavy[2]))  # The heavy poster's 3rd post is damped
+        self.assertIsNone(cursor)
+
+    def test_cursor_pages_are_stable(self):
+        for i in range(7):
+            self.post([self.heavy, self.light, self.close][i % 3], i)
+        expected, _ = self.ranked()
+
+        ids, cursor = self.ranked(limit=3)
+        self.post(self.light, 0)  # Arrives after the first page; must not shift the others
+        again, _ = self.ranked(limit=3, cursor=cursor)
+        while cursor:
+            page, cursor = self.ranked(limit=3, cursor=cursor)
+            ids += page
+        self.assertEqual(ids, expected)
+        self.assertEqual(again, expected[3:6])
+        self.assertEqual(self.client.get('/api/posts/feed/', {'mode': 'ranked', 'cursor': 'x'}).status_code, 400)
+
+    def test_rejects_hand_built_cursors(self):
+        self.post(self.heavy, 1)
+        now = timezone.now()
+        for values in [
+            (now, 10 ** 400, 1),  # Too big for a float
+            (now.replace(tzinfo=None), 1.0, 1),  # Naive
+            (now + timedelta(days=1), 1.0, 1),  # Future
+        ]:
+            response = self.client.get('/api/posts/feed/', {'mode': 'ranked', 'cursor': encode_cursor(*values)})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['error'], 'Invalid cursor')
+
+
+class FeedChangesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        self.friend = User.objects.create_user('bob')
+        Friendship.objects.create(user1=self.user, user2=self.friend, status='accepted', requester=self.user)
+        self.friend_post = Post.objects.create(user=self.friend, image_path='b.jpg', caption='hi')
+        self.own_post = Post.objects.create(user=self.user, image_path='a.jpg', caption='mine')
+        self.comment = Comment.objects.create(post=self.own_post, user=self.friend, comment_text='nice')
+        # Everything so far is older than the watermark and its overlap
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Post.objects.update(created_at=an_hour_ago, updated_at=an_hour_ago)
+        Comment.objects.update(created_at=an_hour_ago)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.watermark = make_watermark()
+
+    def changes(self, watermark=None):
+        return self.client.get('/api/posts/feed/since/', {'watermark': watermark or self.watermark})
+
+    def test_not_modified_expired_and_invalid(self):
+        response = self.changes()
+        self.assertEqual(response.status_code, 304)
+        self.assertTrue(response['X-Watermark'])
+        self.assertEqual(self.changes(make_watermark(timezone.now() - timedelta(days=31))).status_code, 410)
+        self.assertEqual(self.changes('soon').status_code, 400)
+
+    def test_edits_comments_and_deletions(self):
+        self.friend_post.caption = 'edited'
+        self.friend_post.save()
+        new_comment = Comment.objects.create(post=self.own_post, user=self.friend, comment_text='again')
+        deleted_comment_id = self.comment.id
+        self.comment.delete()
+        deleted_post = Post.objects.create(user=self.friend, image_path='c.jpg', caption='gone')
+        deleted_post_id = deleted_post.id
+        deleted_post.delete()
+        # Not visible to alice
+        stranger = User.objects.create_user('mallory')
+        Post.objects.create(user=stranger, image_path='m.jpg', caption='hi').delete()
+
+        response = self.changes()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['posts']], [self.friend_post.id])
+        self.assertEqual([comment['id'] for comment in response.data['comments']], [new_comment.id])
+        self.assertEqual(response.data['deleted'], {'posts': [deleted_post_id], 'comments': [deleted_comment_id]})
+        self.assertFalse(response.data['truncated'])
+
+    @mock.patch('posts.views.MAX_FEED_CHANGES', 1)
+    def test_tombstones_are_capped(self):
+        deleted = [Post.objects.create(user=self.friend, image_path=f'{i}.jpg', caption='gone') for i in range(2)]
+        for post in deleted:
+            post.delete()
+
+        response = self.changes()
+        self.assertEqual(len(response.data['deleted']['posts']), 1)
+        self.assertTrue(response.data['truncated'])
+
+    def test_comment_tombstones_dont_load_posts(self):
+        def delete_queries(count):
+            Comment.objects.bulk_create(
+                Comment(post=self.friend_post, user=self.user, comment_text='bye') for _ in range(count)
+            )
+            with CaptureQueriesContext(connection) as captured:
+                Comment.objects.filter(user=self.user).delete()
+            return len(captured)
+
+        self.assertEqual(delete_queries(3) - delete_queries(1), 2)  # One tombstone insert each
+        self.assertEqual(
+            set(Tombstone.objects.filter(kind='comment', author_id=self.user.id).values_list('post_owner_id', flat=True)),
+            {self.friend.id},
+        )
+
+
+class BatchEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        self.friend = User.objects.create_user('bob')
+        self.stranger = User.objects.create_user('carol')
+        Friendship.objects.create(user1=self.user, user2=self.friend, status='accepted', requester=self.user)
+        self.own_post = Post.objects.create(user=self.user, image_path='a.jpg', caption='mine')
+        self.friend_post = Post.objects.create(user=self.friend, image_path='b.jpg', caption='hi')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_rejects_bad_ids(self):
+        for query, error in [
+            ('', "'ids' is required"),
+            ('?ids=1,x', "Invalid value in 'ids': x"),
+            (f'?ids=1,{2 ** 63}', f"Invalid value in 'ids': {2 ** 63}"),
+            ('?ids=0', "Invalid value in 'ids': 0"),
+            ('?ids=' + ','.join(str(i) for i in range(1, 102)), "Too many items in 'ids' (max 100)"),
+        ]:
+            response = self.client.get(f'/api/posts/batch/{query}')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['error'], error)
+
+        # Duplicates count once against the limit
+        response = self.client.get('/api/posts/batch/?ids=' + ','.join(['1'] * 101))
+        self.assertEqual(response.status_code, 200)
+
+    def test_posts_in_request_order_with_missing(self):
+        ids = [self.friend_post.id, 999, self.own_post.id, self.friend_post.id]
+        response = self.client.get('/api/posts/batch/?ids=' + ','.join(map(str, ids)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.data['posts']], [self.friend_post.id, self.own_post.id])
+        self.assertEqual(response.data['missing'], [999])
+
+    def test_comment_visibility(self):
+        on_own = Comment.objects.create(post=self.own_post, user=self.friend, comment_text='nice')
+        mine = Comment.objects.create(post=self.friend_post, user=self.user, comment_text='cool')
+        Comment.objects.create(post=self.friend_post, user=self.stranger, comment_text='hidden')
+
+        response = self.client.get(f'/api/posts/batch/?ids={self.own_post.id},{self.friend_post.id}')
+        comments = {post['id']: [comment['id'] for comment in post['comments']] for post in response.data['posts']}
+        # Owners see every comment on their post, others only their own
+        self.assertEqual(comments, {self.own_post.id: [on_own.id], self.friend_post.id: [mine.id]})
+
+    def test_profiles_and_friendship_statuses_list_missing(self):
+        response = self.client.get('/api/profile/batch/?usernames=carol,nobody,bob')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([profile['username'] for profile in response.data['profiles']], ['carol', 'bob'])
+        self.assertEqual(response.data['missing'], ['nobody'])
+
+        response = self.client.get('/api/friends/status/?usernames=bob,nobody,carol')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(entry['username'], entry['status'], entry['requester_username']) for entry in response.data['statuses']],
+            [('bob', 'accepted', 'alice'), ('carol', None, None)],
+        )
+        self.assertEqual(response.data['missing'], ['nobody'])
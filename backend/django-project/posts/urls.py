@@ -4,8 +4,10 @@ from . import views
 urlpatterns = [
     # Post endpoints
     path('feed/', views.get_feed, name='post_feed'),
+    path('feed/since/', views.get_feed_changes, name='post_feed_changes'),
     path('', views.create_post, name='create_post'),
     path('me/', views.get_my_posts, name='my_posts'),
+    path('batch/', views.get_posts_batch, name='posts_batch'),
     path('<int:post_id>/', views.get_post, name='get_post'),
     path('<int:post_id>/update/', views.update_post, name='update_post'),
     path('<int:post_id>/delete/', views.delete_post, name='delete_post'),
@@ -1,6 +1,18 @@
-from datetime import timedelta
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Prefetch, Q
 from django.utils import timezone
-from .models import Post
+from .models import Post, Comment
+
+# Changes committed shortly before a watermark was issued may carry an earlier
+# timestamp, so delta sync re-checks this much history. Clients merge by id.
+SYNC_OVERLAP = timedelta(seconds=2)
+
+# How long tombstones are kept; older watermarks must reload the feed
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
 
 def can_user_post(user):
@@ -13,8 +25,55 @@ def can_user_post(user):
     return recent_posts == 0
 
 
+def remove_media_files(paths):
+    """
+    Delete uploaded files (paths relative to MEDIA_ROOT) that no post refers to
+    any more. Call after the posts' delete has committed.
+    """
+    paths = set(paths)
+    still_used = set(Post.objects.filter(image_path__in=paths).values_list('image_path', flat=True))
+    removed = 0
+    for path in paths - still_used:
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, path))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
 def get_user_post_count(user):
     """
     Get the number of posts a user has created.
     """
     return Post.objects.filter(user=user).count()
+
+
+def visible_comments_prefetch(user):
+    """
+    Prefetch the comments `user` may see on each post into `post.visible_comments`.
+    Post owners see all comments (but not those of deleted accounts); everyone else
+    only sees their own.
+    """
+    comments = Comment.objects.filter(
+        Q(post__user=user) | Q(user=user), user__is_active=True
+    ).select_related('user', 'user__profile')
+    return Prefetch('comments', queryset=comments, to_attr='visible_comments')
+
+
+def make_watermark(moment=None):
+    """
+    Encode a point in time as an opaque delta-sync watermark (microseconds since epoch).
+    """
+    moment = moment or timezone.now()
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def parse_watermark(value):
+    """
+    Decode a watermark from make_watermark(). Raises ValueError on bad input.
+    """
+    try:
+        return EPOCH + timedelta(microseconds=int(value))
+    except OverflowError:
+        raise ValueError("Watermark out of range")
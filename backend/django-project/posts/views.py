@@ -1,16 +1,26 @@
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
-from .models import Post, Comment
+from django.utils import timezone
+from .models import Post, Comment, Tombstone
 from .serializers import PostSerializer, PostCreateSerializer, CommentSerializer
 from .permissions import IsPostOwnerOrReadOnly, IsCommentOwnerOrPostOwner
-from .utils import can_user_post
-from friendships.models import Friendship
+from .ranking import ranked_page
+from .tasks import delete_media_file
+from .utils import (
+    can_user_post, visible_comments_prefetch, make_watermark, parse_watermark,
+    SYNC_OVERLAP, TOMBSTONE_RETENTION,
+)
+from friendships.utils import friends_filter
+from backend.batch import parse_batch_param, parse_id
 
 
 class FeedPagination(PageNumberPagination):
@@ -19,32 +29,30 @@ class FeedPagination(PageNumberPagination):
     max_page_size = 50
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_feed(request):
+async def get_feed(request):
     """
-    Get paginated feed of posts from friends (mutual friendships only).
+    Get paginated feed of posts from friends (mutual friendships only), newest first,
+    or with ?mode=ranked ordered by posts.ranking and paged with ?cursor=... instead of ?page=.
+    The returned watermark can be passed to get_feed_changes.
     """
-    # Get all friends (accepted friendships)
-    friendships = Friendship.objects.filter(
-        Q(user1=request.user) | Q(user2=request.user),
-        status='accepted'
-    )
+    watermark = make_watermark()
+    mode = request.query_params.get('mode', 'chronological')
+    if mode == 'ranked':
+        return await get_ranked_feed(request, watermark)
+    if mode != 'chronological':
+        return Response({'error': 'mode must be chronological or ranked'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Extract friend user IDs
-    friend_ids = set()
-    for friendship in friendships:
-        if friendship.user1 == request.user:
-            friend_ids.add(friendship.user2.id)
-        else:
-            friend_ids.add(friendship.user1.id)
+    # Posts from friends, most recent first; friend ids come from a subquery on
+    # friendships, so the friendships are never loaded into Python
+    posts = Post.objects.filter(friends_filter(request.user)).select_related(
+        'user', 'user__profile'
+    ).prefetch_related(visible_comments_prefetch(request.user)).order_by('-created_at')
     
-    # Get posts from friends, ordered by most recent
-    posts = Post.objects.filter(user__id__in=friend_ids).select_related('user', 'user__profile').order_by('-created_at')
-    
-    # Paginate
+    # Paginate (DRF pagination is synchronous, so run it off the event loop)
     paginator = FeedPagination()
-    paginated_posts = paginator.paginate_queryset(posts, request)
+    paginated_posts = await sync_to_async(paginator.paginate_queryset)(posts, request)
     
     serializer = PostSerializer(paginated_posts, many=True, context={'request': request})
     
@@ -53,21 +61,151 @@ def get_feed(request):
     
     return Response({
         'posts': serializer.data,
-        'hasMore': has_more
+        'hasMore': has_more,
+        'watermark': watermark
     })
 
 
+async def get_ranked_feed(request, watermark):
+    try:
+        post_ids, next_cursor = await sync_to_async(ranked_page)(
+            request.user, request.query_params.get('cursor'), FeedPagination().get_page_size(request)
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    posts_by_id = {
+        post.id: post async for post in Post.objects.filter(id__in=post_ids).select_related(
+            'user', 'user__profile'
+        ).prefetch_related(visible_comments_prefetch(request.user))
+    }
+    # Posts deleted since they were ranked are left out
+    posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+    
+    serializer = PostSerializer(posts, many=True, context={'request': request})
+    return Response({
+        'posts': serializer.data,
+        'hasMore': next_cursor is not None,
+        'cursor': next_cursor,
+        'watermark': watermark
+    })
+
+
+# Maximum number of changed posts (and of new comments, and of each kind of tombstone) returned by one delta-sync response
+MAX_FEED_CHANGES = 100
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_post(request, post_id):
+def get_feed_changes(request):
+    """
+    Get feed changes since a watermark (?watermark=... from get_feed or a previous call).
+    Returns new/edited posts, new comments and tombstones for deletions visible to the viewer.
+    Responds 304 when nothing changed, 410 when the watermark is too old to sync from.
+    """
+    try:
+        since = parse_watermark(request.query_params.get('watermark', ''))
+    except ValueError:
+        return Response({'error': 'Invalid watermark'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    now = timezone.now()
+    if since < now - TOMBSTONE_RETENTION:
+        return Response({'error': 'Watermark expired, reload the feed'}, status=status.HTTP_410_GONE)
+    
+    watermark = make_watermark(now)
+    since = since - SYNC_OVERLAP
+    
+    # Subquery rather than a join, so each side of the OR can use its created_at index
+    visible_comments = Q(user=request.user) | Q(post__in=Post.objects.filter(user=request.user).values('id'))
+    changed_posts = Post.objects.filter(friends_filter(request.user), updated_at__gt=since)
+    new_comments = Comment.objects.filter(visible_comments, created_at__gt=since)
+    # Deleted accounts' posts are removed while the friendship still exists, so include them
+    deleted_posts = Tombstone.objects.filter(
+        friends_filter(request.user, field='post_owner', active_only=False), kind='post', deleted_at__gt=since
+    )
+    deleted_comments = Tombstone.objects.filter(
+        Q(author_id=request.user.id) | Q(post_owner_id=request.user.id), kind='comment', deleted_at__gt=since
+    )
+    
+    # Cheap index seeks decide whether there is anything to render at all
+    if not (changed_posts.exists() or new_comments.exists()
+            or deleted_posts.exists() or deleted_comments.exists()):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'X-Watermark': watermark})
+    
+    posts = list(
+        changed_posts.select_related('user', 'user__profile')
+        .prefetch_related(visible_comments_prefetch(request.user))
+        .order_by('-updated_at')[:MAX_FEED_CHANGES + 1]
+    )
+    comments = list(
+        new_comments.select_related('user', 'user__profile')
+        .order_by('created_at')[:MAX_FEED_CHANGES + 1]
+    )
+    deleted_post_ids = list(
+        deleted_posts.order_by('-deleted_at').values_list('object_id', flat=True)[:MAX_FEED_CHANGES + 1]
+    )
+    deleted_comment_ids = list(
+        deleted_comments.order_by('-deleted_at').values_list('object_id', flat=True)[:MAX_FEED_CHANGES + 1]
+    )
+    
+    return Response({
+        'posts': PostSerializer(posts[:MAX_FEED_CHANGES], many=True, context={'request': request}).data,
+        'comments': [
+            {**CommentSerializer(comment).data, 'post_id': comment.post_id}
+            for comment in comments[:MAX_FEED_CHANGES]
+        ],
+        'deleted': {
+            'posts': deleted_post_ids[:MAX_FEED_CHANGES],
+            'comments': deleted_comment_ids[:MAX_FEED_CHANGES],
+        },
+        # Too many changes to sync incrementally; the client should reload the feed
+        'truncated': any(
+            len(changes) > MAX_FEED_CHANGES for changes in (posts, comments, deleted_post_ids, deleted_comment_ids)
+        ),
+        'watermark': watermark
+    })
+
+
+@async_api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def get_post(request, post_id):
     """
     Get a single post by ID.
     """
-    post = get_object_or_404(Post, id=post_id)
+    posts = Post.objects.filter(user__is_active=True).select_related('user', 'user__profile').prefetch_related(
+        visible_comments_prefetch(request.user)
+    )
+    post = await aget_object_or_404(posts, id=post_id)
     serializer = PostSerializer(post, context={'request': request})
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_posts_batch(request):
+    """
+    Get several posts by ID in one request (?ids=1,2,3).
+    Same visibility rules as get_post; unknown IDs are listed in `missing`.
+    """
+    try:
+        post_ids = parse_batch_param(request, 'ids', cast=parse_id)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    posts = Post.objects.filter(id__in=post_ids, user__is_active=True).select_related(
+        'user', 'user__profile'
+    ).prefetch_related(visible_comments_prefetch(request.user))
+    posts_by_id = {post.id: post for post in posts}
+    
+    found = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+    serializer = PostSerializer(found, many=True, context={'request': request})
+    
+    return Response({
+        'posts': serializer.data,
+        'missing': [post_id for post_id in post_ids if post_id not in posts_by_id]
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_post(request):
@@ -127,15 +265,10 @@ def delete_post(request, post_id):
     if post.user != request.user:
         return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Delete image file
-    import os
-    from django.conf import settings
-    
-    image_path = os.path.join(settings.MEDIA_ROOT, post.image_path)
-    if os.path.exists(image_path):
-        os.remove(image_path)
-    
-    post.delete()
+    # The image is removed by a background job once the delete has committed
+    with transaction.atomic():
+        post.delete()
+        delete_media_file.enqueue(path=post.image_path)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
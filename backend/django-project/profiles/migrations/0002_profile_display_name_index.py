@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['display_name', 'user'], name='profiles_display_5b0a2a_idx'),
+        ),
+    ]
@@ -2,9 +2,10 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from backend.dirty import DirtyFieldsMixin
 
 
-class Profile(models.Model):
+class Profile(DirtyFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     display_name = models.CharField(max_length=255)
     bio = models.CharField(max_length=255, blank=True, default='')
@@ -17,6 +18,9 @@ class Profile(models.Model):
         return f"{self.user.username}'s profile"
 
     class Meta:
+        indexes = [
+            models.Index(fields=['display_name', 'user']),  # Friends list sorted by name
+        ]
         db_table = 'profiles'
 
 
@@ -32,5 +36,7 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
+    # Only a profile already loaded on the user can have unsaved changes; checking
+    # with hasattr() would load it, picture and all, on every login
+    if User.profile.is_cached(instance) and instance.profile.get_dirty_fields():
         instance.profile.save()
@@ -1,16 +1,18 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from monitoring.serializers import TimedListSerializer, TimedSerializerMixin
 from .models import Profile
 import base64
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email')
     profile_picture_base64 = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
+        list_serializer_class = TimedListSerializer
         fields = ['username', 'display_name', 'bio', 'link', 'email', 'profile_picture_base64', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
@@ -25,7 +27,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         # Update user fields
         if 'email' in user_data:
             instance.user.email = user_data['email']
-            instance.user.save()
+            instance.user.save(update_fields=['email'])
         
         # Update profile fields
         for attr, value in validated_data.items():
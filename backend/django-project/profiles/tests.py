@@ -1,3 +1,33 @@
+from django.contrib.auth.models import User, update_last_login
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .models import Profile
+
+
+class ProfileSaveTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('alice', password='password123')
+        Profile.objects.filter(user=user).update(profile_picture=b'\xff' * 1000)
+
+    def test_login_does_not_touch_profile(self):
+        user = User.objects.get(username='alice')
+        with CaptureQueriesContext(connection) as captured:
+            update_last_login(None, user)
+        self.assertEqual(len(captured), 1)
+        self.assertIn('last_login', captured[0]['sql'])
+
+    def test_save_writes_only_changed_fields(self):
+        profile = Profile.objects.get(user__username='alice')
+        profile.bio = 'Hello'
+        with CaptureQueriesContext(connection) as captured:
+            profile.save()
+            profile.save()  # Nothing changed since
+        self.assertEqual(len(captured), 1)
+        self.assertNotIn('profile_picture', captured[0]['sql'])
+        self.assertIn('updated_at', captured[0]['sql'])
+
+        profile.refresh_from_db()
+        self.assertEqual((profile.bio, bytes(profile.profile_picture)), ('Hello', b'\xff' * 1000))
+        self.assertEqual(profile.get_dirty_fields(), set())
@@ -1,22 +1,48 @@
+from adrf.decorators import api_view as async_api_view
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from .models import Profile
 from .serializers import ProfileSerializer, ProfilePictureSerializer
+from backend.batch import parse_batch_param
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_profile_by_username(request, username):
-    user = get_object_or_404(User, username=username)
-    profile = get_object_or_404(Profile, user=user)
+async def get_profile_by_username(request, username):
+    profile = await aget_object_or_404(Profile.objects.select_related('user'), user__username=username)
     serializer = ProfileSerializer(profile)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_profiles_batch(request):
+    """
+    Get several profiles by username in one request (?usernames=alice,bob).
+    Unknown usernames are listed in `missing`.
+    """
+    try:
+        usernames = parse_batch_param(request, 'usernames')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    profiles = Profile.objects.filter(user__username__in=usernames).select_related('user')
+    profiles_by_username = {profile.user.username: profile for profile in profiles}
+    
+    found = [profiles_by_username[name] for name in usernames if name in profiles_by_username]
+    serializer = ProfileSerializer(found, many=True)
+    
+    return Response({
+        'profiles': serializer.data,
+        'missing': [name for name in usernames if name not in profiles_by_username]
+    })
+
+
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
 def my_profile(request):
@@ -49,14 +75,12 @@ def upload_profile_picture(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_profile_picture(request, username):
-    user = get_object_or_404(User, username=username)
-    profile = get_object_or_404(Profile, user=user)
+async def get_profile_picture(request, username):
+    profile = await aget_object_or_404(Profile.objects.only('profile_picture'), user__username=username)
     
     if profile.profile_picture:
-        from django.http import HttpResponse
         return HttpResponse(profile.profile_picture, content_type='image/jpeg')
     
     return Response({'error': 'No profile picture'}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def reinstall_indexes(sender, using, plan=None, **kwargs):
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+
+    from .index import install
+
+    # SQLite drops triggers when a migration rebuilds their table
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and MigrationRecorder(connection).migration_qs.filter(app='search').exists():
+        install(connection)
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        post_migrate.connect(reinstall_indexes, sender=self)
@@ -0,0 +1,219 @@
+"""
+Search indexes for user autocomplete and post/comment text.
+
+PostgreSQL: a trigram GIN index on UPPER(username) (btree text_pattern_ops
+if pg_trgm is not available) serves username prefix lookups, and GIN
+expression indexes on to_tsvector() serve display name word prefixes and
+full-text matches on captions and comments. PostgreSQL keeps expression
+indexes current on every write.
+
+SQLite: FTS5 tables, kept current by triggers on the source tables, so
+bulk_create, imports and raw updates are indexed the same way as save().
+search_posts and search_comments are external-content tables over posts
+and comments; search_users holds the username and display name of each
+active user, keyed by user id.
+
+install() is idempotent. It runs from the search migration and again after
+every migrate, because SQLite drops a table's triggers when a migration
+rebuilds it.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Text search configuration (PostgreSQL) and tokenizer (SQLite); both stem English words
+TS_CONFIG = 'english'
+FTS_TOKENIZER = 'porter unicode61'
+
+# Full-text indexed columns: table -> (column, FTS5 table)
+TEXT_COLUMNS = {
+    'posts': ('caption', 'search_posts'),
+    'comments': ('comment_text', 'search_comments'),
+}
+
+POSTGRESQL_TEXT_SQL = [
+    f"CREATE INDEX IF NOT EXISTS {fts}_tsv ON {table} USING gin (to_tsvector('{TS_CONFIG}', {column}))"
+    for table, (column, fts) in TEXT_COLUMNS.items()
+] + [
+    # Unstemmed, for prefix matches on any word of a display name
+    "CREATE INDEX IF NOT EXISTS search_display_name_tsv ON profiles USING gin (to_tsvector('simple', display_name))",
+]
+
+
+def postgresql_username_sql(trigram):
+    # Indexed as UPPER(username::text), the left-hand side Django generates for istartswith
+    if trigram:
+        return 'CREATE INDEX IF NOT EXISTS search_username_trgm ON auth_user USING gin (UPPER(username::text) gin_trgm_ops)'
+    return 'CREATE INDEX IF NOT EXISTS search_username_prefix ON auth_user (UPPER(username::text) text_pattern_ops)'
+
+
+SQLITE_USER_SQL = [
+    # tokenchars keep usernames like "jane.doe_99" as one token
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_users USING fts5(
+        username, display_name, tokenize="unicode61 tokenchars '_.-@+'", prefix='1 2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS search_users_ai AFTER INSERT ON auth_user WHEN new.is_active BEGIN
+        INSERT INTO search_users (rowid, username, display_name) VALUES (new.id, new.username, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_users_au AFTER UPDATE ON auth_user
+    WHEN old.username IS NOT new.username OR old.is_active IS NOT new.is_active BEGIN
+        DELETE FROM search_users WHERE rowid = old.id;
+        INSERT INTO search_users (rowid, username, display_name)
+        SELECT new.id, new.username, COALESCE((SELECT display_name FROM profiles WHERE user_id = new.id), '')
+        WHERE new.is_active;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_users_ad AFTER DELETE ON auth_user BEGIN
+        DELETE FROM search_users WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_profiles_ai AFTER INSERT ON profiles BEGIN
+        UPDATE search_users SET display_name = new.display_name WHERE rowid = new.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_profiles_au AFTER UPDATE ON profiles
+    WHEN old.display_name IS NOT new.display_name BEGIN
+        UPDATE search_users SET display_name = new.display_name WHERE rowid = new.user_id;
+    END""",
+]
+
+SQLITE_USER_REBUILD_SQL = [
+    'DELETE FROM search_users',
+    """INSERT INTO search_users (rowid, username, display_name)
+    SELECT u.id, u.username, COALESCE(p.display_name, '')
+    FROM auth_user u LEFT JOIN profiles p ON p.user_id = u.id WHERE u.is_active""",
+]
+
+
+def sqlite_text_sql(table, column, fts):
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column}, content='{table}', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table}
+        WHEN old.{column} IS NOT new.{column} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+        END""",
+    ]
+
+
+def sqlite_tables():
+    return ['search_users'] + [fts for _, fts in TEXT_COLUMNS.values()]
+
+
+def install(connection):
+    """
+    Create the search indexes (and, on SQLite, the FTS tables and triggers) if missing.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # pg_trgm ships with contrib, which minimal PostgreSQL builds leave out
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            trigram = cursor.fetchone() is not None
+            if trigram:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for sql in [postgresql_username_sql(trigram)] + POSTGRESQL_TEXT_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            existing = set(connection.introspection.table_names(cursor))
+            for sql in SQLITE_USER_SQL:
+                cursor.execute(sql)
+            if 'search_users' not in existing:
+                for sql in SQLITE_USER_REBUILD_SQL:
+                    cursor.execute(sql)
+            for table, (column, fts) in TEXT_COLUMNS.items():
+                for sql in sqlite_text_sql(table, column, fts):
+                    cursor.execute(sql)
+                if fts not in existing:
+                    cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for name in ['search_username_trgm', 'search_username_prefix', 'search_display_name_tsv']:
+                cursor.execute(f'DROP INDEX IF EXISTS {name}')
+            for _, fts in TEXT_COLUMNS.values():
+                cursor.execute(f'DROP INDEX IF EXISTS {fts}_tsv')
+        elif connection.vendor == 'sqlite':
+            # The triggers live on the source tables, so they outlive the FTS tables
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search%'")
+            for (name,) in cursor.fetchall():
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            for table in sqlite_tables():
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class TextMatch(Func):
+    """
+    to_tsvector(config, column) @@ parser(config, query), spelled like the index
+    expression so PostgreSQL can use the index.
+    """
+    output_field = BooleanField()
+
+    def __init__(self, column, query, config=TS_CONFIG, parser='websearch_to_tsquery'):
+        super().__init__(F(column), Value(query))
+        self.config = config
+        self.parser = parser
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, column_params = compiler.compile(self.source_expressions[0])
+        query, query_params = compiler.compile(self.source_expressions[1])
+        sql = f"to_tsvector('{self.config}', {column}) @@ {self.parser}('{self.config}', {query})"
+        return sql, [*column_params, *query_params]
+
+
+def fts_phrase(text, prefix=False):
+    """
+    Quote `text` as one FTS5 phrase (optionally a prefix query), so user input
+    is never parsed as FTS5 query syntax.
+    """
+    phrase = '"' + text.replace('"', '""') + '"'
+    return phrase + '*' if prefix else phrase
+
+
+def user_prefix_filter(query, connection):
+    """
+    Q matching users whose username, or any word of whose display name, starts with `query`.
+    """
+    if connection.vendor == 'sqlite':
+        return Q(id__in=RawSQL(
+            'SELECT rowid FROM search_users WHERE search_users MATCH %s', [fts_phrase(query, prefix=True)]
+        ))
+    from django.contrib.auth.models import User
+    from profiles.models import Profile
+
+    users = User.objects.filter(username__istartswith=query).values('id')
+    words = re.findall(r'\w+', query)
+    if connection.vendor == 'postgresql' and words:
+        # "zed zeb" -> 'zed <-> zeb:*', the same phrase prefix as on SQLite
+        display_names = Profile.objects.filter(
+            TextMatch('display_name', ' <-> '.join(words) + ':*', config='simple', parser='to_tsquery')
+        )
+        # A UNION rather than OR, so each side uses its own index
+        users = users.union(display_names.values('user_id'))
+    return Q(id__in=users)
+
+
+def text_search(queryset, query):
+    """
+    Filter `queryset` (posts or comments) to rows whose text matches all words of `query`.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    column, fts = TEXT_COLUMNS[table]
+    if connection.vendor == 'postgresql':
+        return queryset.filter(TextMatch(column, query))
+    if connection.vendor == 'sqlite':
+        words = re.findall(r'\w+', query)
+        if not words:
+            return queryset.none()
+        match = ' '.join(fts_phrase(word) for word in words)
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match]))
+    return queryset.filter(**{f'{column}__icontains': query})
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from search.index import install
+    install(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from search.index import uninstall
+    uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('profiles', '0001_initial'),
+        ('posts', '0003_post_image_path_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from friendships.models import Friendship
+from posts.models import Post
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='password123')
+        self.friend = User.objects.create_user('bob_smith', password='password123')
+        self.stranger = User.objects.create_user('bobby', password='password123')
+        Friendship.objects.create(user1=self.user, user2=self.friend, status='accepted', requester=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def usernames(self, query):
+        response = self.client.get('/api/search/users/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [user['username'] for user in response.data['users']]
+
+    def test_user_autocomplete_follows_saves(self):
+        self.assertEqual(self.usernames('bob'), ['bobby', 'bob_smith'])
+        self.assertEqual(self.usernames('BOB_S'), ['bob_smith'])
+        self.assertEqual(self.usernames('ali'), [])  # Never yourself
+
+        self.stranger.profile.display_name = 'Zed Zebra'
+        self.stranger.profile.save()
+        self.assertEqual(self.usernames('zeb'), ['bobby'])
+
+        self.friend.username = 'robert'
+        self.friend.save()
+        self.assertEqual(self.usernames('rob'), ['robert'])
+        self.assertEqual(self.usernames('bob_'), ['robert'])  # Display name is still bob_smith
+
+        self.stranger.is_active = False
+        self.stranger.save()
+        self.assertEqual(self.usernames('zeb'), [])
+
+    def test_caption_search_is_limited_to_visible_posts(self):
+        mine = Post.objects.create(user=self.user, image_path='a.jpg', caption='Running on the beach')
+        friends = Post.objects.create(user=self.friend, image_path='b.jpg', caption='Beach day!')
+        Post.objects.create(user=self.stranger, image_path='c.jpg', caption='Secret beach')
+
+        response = self.client.get('/api/search/posts/', {'q': 'beach'})
+        self.assertEqual([post['id'] for post in response.data['posts']], [friends.id, mine.id])
+
+        # Stemmed, every word must match, and edits are picked up
+        response = self.client.get('/api/search/posts/', {'q': 'run beach'})
+        self.assertEqual([post['id'] for post in response.data['posts']], [mine.id])
+        mine.caption = 'Walking in town'
+        mine.save()
+        response = self.client.get('/api/search/posts/', {'q': 'run beach'})
+        self.assertEqual(response.data['posts'], [])
+
+        self.assertEqual(self.client.get('/api/search/posts/').status_code, 400)
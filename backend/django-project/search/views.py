@@ -0,0 +1,85 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.contrib.auth.models import User
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+from friendships.serializers import FriendSerializer
+from friendships.utils import friends_filter
+from posts.models import Post
+from posts.serializers import PostSerializer
+from posts.utils import visible_comments_prefetch
+from .index import text_search, user_prefix_filter
+
+MAX_QUERY_LENGTH = 100
+USER_RESULTS = 10
+MAX_USER_RESULTS = 25
+
+
+class SearchPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 50
+
+
+def get_query(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        raise ValueError('q is required')
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValueError(f'q must be at most {MAX_QUERY_LENGTH} characters')
+    return query
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_users(request):
+    """
+    Autocomplete users by username or display name prefix (?q=ali&limit=10).
+    Exact username matches come first, then shorter usernames.
+    """
+    try:
+        query = get_query(request)
+        limit = min(int(request.query_params.get('limit', USER_RESULTS)), MAX_USER_RESULTS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    connection = connections[router.db_for_read(User)]
+    users = User.objects.filter(
+        user_prefix_filter(query, connection), is_active=True
+    ).exclude(id=request.user.id).select_related('profile').annotate(
+        exact=Case(When(username__iexact=query, then=Value(0)), default=Value(1), output_field=IntegerField()),
+        username_length=Length('username'),
+    ).order_by('exact', 'username_length', 'username')[:max(limit, 1)]
+
+    return Response({'users': FriendSerializer(users, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_posts(request):
+    """
+    Full-text search over the captions of your own and your friends' posts (?q=beach+sunset&page=1).
+    Every word must match (stemmed, so "running" finds "run"); newest posts first.
+    """
+    try:
+        query = get_query(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    visible = Post.objects.filter(Q(user=request.user) | friends_filter(request.user))
+    posts = text_search(visible, query).select_related(
+        'user', 'user__profile'
+    ).prefetch_related(visible_comments_prefetch(request.user)).order_by('-created_at')
+
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(posts, request)
+    serializer = PostSerializer(page, many=True, context={'request': request})
+    return Response({
+        'posts': serializer.data,
+        'count': paginator.page.paginator.count,
+        'hasMore': paginator.page.has_next(),
+    })
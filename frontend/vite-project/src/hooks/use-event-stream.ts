@@ -0,0 +1,33 @@
+import * as React from "react"
+import { getApiUrl } from "@/config/api"
+
+type EventHandlers = Record<string, (data: any) => void>
+
+/**
+ * Subscribe to server-pushed notifications (new_post, new_comment,
+ * friend_request, friend_request_accepted) instead of polling.
+ * EventSource reconnects on its own if the stream drops.
+ */
+export function useEventStream(handlers: EventHandlers) {
+  const handlersRef = React.useRef(handlers)
+  handlersRef.current = handlers
+
+  React.useEffect(() => {
+    const source = new EventSource(getApiUrl("/api/events/stream/"), {
+      withCredentials: true,
+    })
+    const eventTypes = Object.keys(handlersRef.current)
+    const listeners = eventTypes.map((type) => {
+      const listener = (event: MessageEvent) => {
+        handlersRef.current[type]?.(JSON.parse(event.data))
+      }
+      source.addEventListener(type, listener)
+      return [type, listener] as const
+    })
+
+    return () => {
+      listeners.forEach(([type, listener]) => source.removeEventListener(type, listener))
+      source.close()
+    }
+  }, [])
+}
@@ -5,6 +5,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { UserPlus, X, Check } from "lucide-react";
+import { useEventStream } from "@/hooks/use-event-stream";
 
 interface Friend {
   id: string;
@@ -44,29 +45,53 @@ export default function FriendManagementPage() {
   const [friendRequests, setFriendRequests] = useState<FriendRequest[]>([]);
   const [sentRequests, setSentRequests] = useState<SentRequest[]>([]);
   const [friends, setFriends] = useState<Friend[]>([]);
+  const [friendsCount, setFriendsCount] = useState(0);
+  const [friendsCursor, setFriendsCursor] = useState<string | null>(null);
+  const [friendsFilter, setFriendsFilter] = useState("");
+  const [friendsSort, setFriendsSort] = useState<"name" | "date">("name");
 
   // Fetch initial data
   useEffect(() => {
-    fetchFriends();
     fetchFriendRequests();
     fetchSentRequests();
   }, []);
 
-  const fetchFriends = async () => {
+  // The friends list is paged and filtered by the server; refetch from the start when either changes
+  useEffect(() => {
+    const timeout = setTimeout(() => fetchFriends(), 200);
+    return () => clearTimeout(timeout);
+  }, [friendsFilter, friendsSort]);
+
+  // Refresh when the server pushes friend request changes
+  useEventStream({
+    friend_request: () => fetchFriendRequests(),
+    friend_request_accepted: () => {
+      fetchFriends();
+      fetchSentRequests();
+    },
+  });
+
+  const fetchFriends = async (cursor?: string) => {
+    const params = new URLSearchParams({ sort: friendsSort, limit: "50" });
+    if (friendsFilter.trim()) params.set("q", friendsFilter.trim());
+    if (cursor) params.set("cursor", cursor);
     try {
-      const response = await fetch(getApiUrl("/api/friends/", {
+      const response = await fetch(getApiUrl(`/api/friends/?${params}`), {
         credentials: "include",
       });
       if (response.ok) {
         const data = await response.json();
-        setFriends(data.friends.map((f: any) => ({
+        const page: Friend[] = data.friends.map((f: any) => ({
           id: f.id,
           username: f.friend.username,
           displayName: f.friend.display_name,
           profilePicture: f.friend.profile_picture_base64 
             ? `data:image/jpeg;base64,${f.friend.profile_picture_base64}` 
             : undefined,
-        })));
+        }));
+        setFriends(prev => (cursor ? [...prev, ...page] : page));
+        setFriendsCount(data.total);
+        setFriendsCursor(data.next);
       }
     } catch (error) {
       console.error("Error fetching friends:", error);
@@ -206,6 +231,7 @@ export default function FriendManagementPage() {
 
         if (response.ok) {
           setFriends(prev => prev.filter(f => f.id !== friendId));
+          setFriendsCount(prev => prev - 1);
         } else {
           const data = await response.json();
           setError(data.error || "Failed to remove friend");
@@ -365,7 +391,22 @@ export default function FriendManagementPage() {
 
       {/* Your Friends Section */}
       <div className="space-y-4">
-        <h2 className="text-2xl font-bold text-foreground">Your Friends ({friends.length})</h2>
+        <h2 className="text-2xl font-bold text-foreground">Your Friends ({friendsCount})</h2>
+        <div className="flex gap-2">
+          <Input
+            placeholder="Filter by name"
+            value={friendsFilter}
+            onChange={(e) => setFriendsFilter(e.target.value)}
+          />
+          <select
+            value={friendsSort}
+            onChange={(e) => setFriendsSort(e.target.value as "name" | "date")}
+            className="rounded-md border border-input bg-background px-3 text-sm"
+          >
+            <option value="name">Name</option>
+            <option value="date">Newest</option>
+          </select>
+        </div>
         <div className="bg-card border border-border rounded-lg p-6">
           {friends.length > 0 ? (
             <div className="space-y-3">
@@ -398,6 +439,15 @@ export default function FriendManagementPage() {
                   </Button>
                 </div>
               ))}
+              {friendsCursor && (
+                <Button onClick={() => fetchFriends(friendsCursor)} variant="outline" className="w-full">
+                  Load more
+                </Button>
+              )}
+            </div>
+          ) : friendsFilter.trim() ? (
+            <div className="text-center py-8 text-muted-foreground">
+              <p className="text-sm">No friends match "{friendsFilter.trim()}"</p>
             </div>
           ) : (
             <div className="text-center py-8 text-muted-foreground">